@@ -0,0 +1,110 @@
+"""Tile inference throughput for 1..N worker processes.
+
+    python -m benchmarks.bench_parallel_scaling --model models/uav.h5 --size 4096 --max-workers 8
+
+The in-process run_patch_prediction is the baseline. Every parallel mask is
+checked against it. The first call of each pool (spawn + model load +
+one pass) is reported separately, because the detector keeps its pool
+alive across scenes.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import DEFAULT_BATCH_SIZE, DEFAULT_TILE_SIZE
+from models.backends import BACKENDS, load_backend
+from utils.helper import run_patch_prediction
+from utils.parallel_inference import ParallelTilePredictor
+
+def _best_of(fn, repeats: int):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def build_report(args) -> dict:
+    model = load_backend(args.model, args.backend)
+    channels = model.input_shape[-1] or 3
+    image = np.random.RandomState(args.seed).rand(args.size, args.size, channels).astype(np.float32)
+    mpix = args.size * args.size / 1e6
+
+    run_patch_prediction(model, image[:args.tile_size, :args.tile_size], args.tile_size, batch_size=args.batch_size)
+    serial_s, reference = _best_of(
+        lambda: run_patch_prediction(model, image, args.tile_size, batch_size=args.batch_size), args.repeats
+    )
+    rows = {"in-process": {'workers': 0, 'first_call_s': None, 'elapsed_s': round(serial_s, 4),
+                           'mpix_per_s': round(mpix / serial_s, 3), 'speedup': 1.0, 'efficiency': None,
+                           'identical': True}}
+
+    for workers in range(1, args.max_workers + 1):
+        with ParallelTilePredictor(args.model, backend=args.backend, workers=workers, batch_size=args.batch_size,
+                                   threads_per_worker=args.threads_per_worker) as predictor:
+            start = time.perf_counter()
+            predictor.predict(image, args.tile_size)
+            first_call_s = time.perf_counter() - start
+            elapsed_s, mask = _best_of(lambda: predictor.predict(image, args.tile_size), args.repeats)
+        rows[f"{workers} worker"] = {
+            'workers': workers,
+            'first_call_s': round(first_call_s, 3),
+            'elapsed_s': round(elapsed_s, 4),
+            'mpix_per_s': round(mpix / elapsed_s, 3),
+            'speedup': round(serial_s / elapsed_s, 3),
+            'efficiency': round(serial_s / elapsed_s / workers, 3),
+            'identical': bool(np.array_equal(mask, reference)),
+        }
+
+    return {
+        'model': args.model,
+        'backend': args.backend,
+        'image_size': args.size,
+        'tile_size': args.tile_size,
+        'batch_size': args.batch_size,
+        'cpu_count': os.cpu_count(),
+        'results': rows,
+    }
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{'mode':<12}{'1st call s':>11}{'time s':>10}{'MPix/s':>10}{'speedup':>9}{'eff.':>7}{'same':>6}",
+        "-" * 65,
+    ]
+    for label, row in report['results'].items():
+        efficiency = "-" if row['efficiency'] is None else f"{row['efficiency']:.2f}"
+        first_call = "-" if row['first_call_s'] is None else f"{row['first_call_s']:.2f}"
+        lines.append(
+            f"{label:<12}{first_call:>11}{row['elapsed_s']:>10.3f}{row['mpix_per_s']:>10.2f}"
+            f"{row['speedup']:>9.2f}{efficiency:>7}{'ya' if row['identical'] else 'TIDAK':>6}"
+        )
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Skalabilitas inferensi tile multi-proses.")
+    parser.add_argument("--model", required=True, help="Path model")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="keras")
+    parser.add_argument("--size", type=int, default=2048, help="Sisi citra sintetis (piksel)")
+    parser.add_argument("--tile-size", type=int, default=DEFAULT_TILE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Simpan laporan sebagai JSON")
+    args = parser.parse_args(argv)
+
+    report = build_report(args)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if all(row['identical'] for row in report['results'].values()) else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
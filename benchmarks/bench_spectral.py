@@ -0,0 +1,97 @@
+"""Spectral index kernels against the original NumPy expression.
+
+    python -m benchmarks.bench_spectral --size 4096
+
+Reports time and tracemalloc allocation peak of the original compute_ndwi
+expression and of the chunked kernel in utils/spectral.py, for NDWI alone
+and for NDWI + MNDWI + NDVI from the same bands, and checks that the
+results are identical.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.spectral import SPECTRAL_INDICES, compute_indices, normalized_difference
+
+def legacy_compute_ndwi(band_green, band_nir, threshold=0.2):
+    # compute_ndwi before the chunked kernel, kept here as the reference.
+    denominator = band_green + band_nir
+    denominator = np.where(denominator == 0, 1e-8, denominator)
+    ndwi = (band_green - band_nir) / denominator
+    ndwi = np.nan_to_num(ndwi, nan=0.0, posinf=1.0, neginf=-1.0)
+    ndwi_normalized = (ndwi + 1) / 2
+    ndwi_normalized = np.where(ndwi_normalized < threshold, 0.0, ndwi_normalized)
+    return ndwi_normalized
+
+def measure(fn, repeats: int):
+    result = fn()
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return best, peak, result
+
+def synthetic_bands(size: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    bands = {}
+    for name in ("B3", "B4", "B8", "B11"):
+        band = rng.integers(0, 10000, size=(size, size)).astype(np.float32)
+        band[rng.random((size, size)) < 0.01] = 0
+        bands[name] = band
+    return bands
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark indeks spektral.")
+    parser.add_argument("--size", type=int, default=4096, help="Sisi band sintetis (piksel)")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    bands = synthetic_bands(args.size, args.seed)
+    # B3 == B8 == 0 in some pixels exercises the zero-denominator branch.
+    bands["B8"][:8, :8] = 0
+    bands["B3"][:8, :8] = 0
+    mpix = args.size * args.size / 1e6
+    indices = list(SPECTRAL_INDICES)
+
+    cases = {
+        "legacy ndwi": lambda: legacy_compute_ndwi(bands["B3"], bands["B8"], args.threshold),
+        "fused ndwi": lambda: normalized_difference(bands["B3"], bands["B8"], normalize=True, threshold=args.threshold),
+        "legacy 3 indices": lambda: [
+            legacy_compute_ndwi(bands[a], bands[b], args.threshold) for a, b in SPECTRAL_INDICES.values()
+        ],
+        "fused 3 indices": lambda: compute_indices(
+            bands, indices, thresholds={index: args.threshold for index in indices}
+        ),
+    }
+
+    results = {name: measure(fn, args.repeats) for name, fn in cases.items()}
+
+    print(f"{'case':<20}{'time s':>10}{'MPix/s':>10}{'peak MB':>10}")
+    print("-" * 50)
+    for name, (seconds, peak, _) in results.items():
+        print(f"{name:<20}{seconds:>10.4f}{mpix / seconds:>10.1f}{peak:>10.1f}")
+
+    same_ndwi = np.array_equal(results["legacy ndwi"][2], results["fused ndwi"][2])
+    fused = results["fused 3 indices"][2]
+    same_all = all(
+        np.array_equal(legacy, fused[index]) for legacy, index in zip(results["legacy 3 indices"][2], indices)
+    )
+    print()
+    print(f"Hasil identik: ndwi={'ya' if same_ndwi else 'TIDAK'}, 3 indeks={'ya' if same_all else 'TIDAK'}")
+    return 0 if same_ndwi and same_all else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
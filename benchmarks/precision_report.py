@@ -0,0 +1,129 @@
+"""Throughput vs. mask accuracy of reduced-precision models.
+
+    python -m benchmarks.precision_report --model models/uav.h5 --model-type uav \\
+        --images samples/a.tif samples/b.tif --min-iou 0.98
+
+Calibration tiles (for INT8) and evaluation tiles are drawn from disjoint
+positions of the given scenes. The float32 Keras model is the baseline.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import DEFAULT_BATCH_SIZE, DEFAULT_TILE_SIZE
+from models.backends import PRECISIONS, check_backend_parity, load_backend, model_path_for_backend
+from models.quantization import calibration_tiles, quantize_model
+
+def measure_throughput(model, tiles: np.ndarray, batch_size: int, repeats: int = 3) -> float:
+    model.predict(tiles[:batch_size], verbose=0)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for i in range(0, len(tiles), batch_size):
+            model.predict(tiles[i:i + batch_size], verbose=0)
+        best = min(best, time.perf_counter() - start)
+    return len(tiles) / best
+
+def _model_size_mb(path: str) -> float:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files) / 2 ** 20
+    return os.path.getsize(path) / 2 ** 20
+
+def build_report(args) -> dict:
+    from models.coastline_detector import UAVCoastlineDetector, SentinelCoastlineDetector
+
+    detector = UAVCoastlineDetector() if args.model_type == "uav" else SentinelCoastlineDetector()
+    tiles = calibration_tiles(args.images, detector, args.tile_size, args.calibration_tiles + args.eval_tiles, seed=args.seed)
+    calibration, evaluation = tiles[:args.calibration_tiles], tiles[args.calibration_tiles:]
+    if len(evaluation) == 0:
+        raise SystemExit("Tidak ada tile evaluasi tersisa; tambah citra atau kurangi --calibration-tiles.")
+
+    models = {"float32 (keras)": load_backend(args.model, "keras")}
+    paths = {"float32 (keras)": args.model}
+    for precision in args.precisions:
+        path = model_path_for_backend(args.model, "tflite", precision)
+        if args.reconvert or not os.path.exists(path):
+            quantize_model(args.model, precision, calibration=calibration, output_path=path)
+        label = f"{precision} (tflite)"
+        models[label] = load_backend(path, "tflite")
+        paths[label] = path
+
+    parity = check_backend_parity(models, evaluation, reference="float32 (keras)", batch_size=args.batch_size)
+    tile_mpix = args.tile_size * args.tile_size / 1e6
+
+    rows = {}
+    for label, model in models.items():
+        tiles_per_s = measure_throughput(model, evaluation, args.batch_size, args.repeats)
+        rows[label] = {
+            'model_path': paths[label],
+            'size_mb': round(_model_size_mb(paths[label]), 3),
+            'tiles_per_s': round(tiles_per_s, 2),
+            'mpix_per_s': round(tiles_per_s * tile_mpix, 3),
+            'iou': round(parity[label]['iou'], 5),
+            'pixel_agreement': round(parity[label]['pixel_agreement'], 5),
+        }
+
+    baseline = rows["float32 (keras)"]['tiles_per_s']
+    for row in rows.values():
+        row['speedup'] = round(row['tiles_per_s'] / baseline, 3)
+
+    eligible = [label for label, row in rows.items() if row['iou'] >= args.min_iou]
+    recommended = max(eligible, key=lambda label: rows[label]['tiles_per_s']) if eligible else None
+
+    return {
+        'model': args.model,
+        'model_type': args.model_type,
+        'calibration_tiles': int(len(calibration)),
+        'eval_tiles': int(len(evaluation)),
+        'batch_size': args.batch_size,
+        'min_iou': args.min_iou,
+        'results': rows,
+        'recommended': recommended,
+    }
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{'precision':<18}{'size MB':>9}{'tiles/s':>10}{'MPix/s':>9}{'speedup':>9}{'IoU':>9}{'agree':>9}",
+        "-" * 73,
+    ]
+    for label, row in report['results'].items():
+        lines.append(
+            f"{label:<18}{row['size_mb']:>9.2f}{row['tiles_per_s']:>10.1f}{row['mpix_per_s']:>9.2f}"
+            f"{row['speedup']:>9.2f}{row['iou']:>9.4f}{row['pixel_agreement']:>9.4f}"
+        )
+    lines.append("")
+    lines.append(f"Rekomendasi (IoU >= {report['min_iou']}): {report['recommended'] or 'tidak ada'}")
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Laporan throughput vs IoU untuk model presisi rendah.")
+    parser.add_argument("--model", required=True, help="Model Keras float32 (.h5)")
+    parser.add_argument("--model-type", choices=["uav", "sentinel"], required=True)
+    parser.add_argument("--images", nargs="+", required=True, help="GeoTIFF representatif")
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=["float32", "float16", "int8"])
+    parser.add_argument("--calibration-tiles", type=int, default=64)
+    parser.add_argument("--eval-tiles", type=int, default=32)
+    parser.add_argument("--tile-size", type=int, default=DEFAULT_TILE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-iou", type=float, default=0.98)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reconvert", action="store_true", help="Konversi ulang walau file model sudah ada")
+    parser.add_argument("--json", help="Simpan laporan sebagai JSON")
+    args = parser.parse_args(argv)
+
+    report = build_report(args)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,228 @@
+"""Throughput and memory benchmarks on synthetic scenes.
+
+    python -m benchmarks.run_benchmarks --sizes 512 1024 2048
+    python -m benchmarks.run_benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --threshold 0.2
+
+Scenes (3-band UAV, 13-band Sentinel-2) and stand-in models are generated
+under --workdir, so runs are reproducible without real data or weights.
+Every case is timed best-of --repeats and reported as MPix/s per scene
+size (the scaling curve), together with its tracemalloc allocation peak,
+measured in a separate untimed run.
+
+Throughput depends on the machine: save the baseline on the machine that
+runs the comparison. The exit status is 1 when any case is more than
+--threshold slower than the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.synthetic import build_stub_model, write_synthetic_scene
+from config.settings import DEFAULT_BATCH_SIZE, DEFAULT_TILE_SIZE
+from utils.tracing import StageTracer, activate, trace_stage
+
+# The preview cases need a QApplication alive for the whole run.
+_app = None
+
+def _prepare_scenes(workdir: str, size: int, seed: int) -> dict:
+    scenes = {}
+    for kind in ("uav", "sentinel"):
+        path = os.path.join(workdir, f"{kind}_{size}.tif")
+        if not os.path.exists(path):
+            write_synthetic_scene(path, kind, size, size, seed)
+        scenes[kind] = path
+    return scenes
+
+def _prepare_models(workdir: str, tile_size: int) -> dict:
+    models = {}
+    for kind, channels in (("uav", 3), ("sentinel", 1)):
+        path = os.path.join(workdir, f"stub_{kind}_{tile_size}.h5")
+        if not os.path.exists(path):
+            build_stub_model(path, channels, tile_size)
+        models[kind] = path
+    return models
+
+def build_cases(scenes: dict, models: dict, workdir: str, size: int, args) -> dict:
+    # name -> zero-argument callable; inputs are prepared here, outside the
+    # timed region, so each case measures only its own function.
+    from models.backends import load_backend
+    from utils.helper import run_patch_prediction
+    from utils.preprocess import preprocess_image_uav, preprocess_sentinel2
+    from utils.postprocess import morphological_smooth, mask_to_polygons, extract_coastline, contour_coastline
+
+    uav_model = load_backend(models["uav"])
+    sentinel_model = load_backend(models["sentinel"])
+    uav_image, profile, transform, crs = preprocess_image_uav(scenes["uav"])
+    ndwi_stack = preprocess_sentinel2(scenes["sentinel"])[0]
+
+    mask = run_patch_prediction(uav_model, uav_image, args.tile_size, batch_size=args.batch_size)
+    mask = morphological_smooth(mask, kernel_size=7, iterations=1)
+
+    mask_path = os.path.join(workdir, f"mask_{size}.tif")
+    shp_path = os.path.join(workdir, f"coastline_{size}.shp")
+    from core.raster_writer import MaskWriter
+    with MaskWriter(mask_path, profile) as writer:
+        writer.write(mask)
+    polygons = mask_to_polygons(mask, transform, crs)
+    extract_coastline(polygons).to_file(shp_path)
+
+    cases = {
+        "preprocess_image_uav": lambda: preprocess_image_uav(scenes["uav"]),
+        "preprocess_sentinel2": lambda: preprocess_sentinel2(scenes["sentinel"]),
+        "run_patch_prediction[uav]": lambda: run_patch_prediction(
+            uav_model, uav_image, args.tile_size, batch_size=args.batch_size),
+        "run_patch_prediction[sentinel]": lambda: run_patch_prediction(
+            sentinel_model, ndwi_stack[0], args.tile_size, is_multichannel=False, batch_size=args.batch_size),
+        "morphological_smooth": lambda: morphological_smooth(mask, kernel_size=7, iterations=1),
+        "mask_to_polygons": lambda: mask_to_polygons(mask, transform, crs),
+        "extract_coastline": lambda: extract_coastline(polygons),
+        "contour_coastline": lambda: contour_coastline(mask, transform, crs),
+    }
+
+    try:
+        from PyQt5.QtWidgets import QApplication
+        from utils.image_processor import (
+            generate_input_preview, generate_output_mask_preview, generate_shapefile_preview
+        )
+        global _app
+        _app = QApplication.instance() or QApplication([])
+    except Exception as e:
+        print(f"Preview dilewati (PyQt5 tidak tersedia: {e})")
+    else:
+        cases.update({
+            "generate_input_preview[uav]": lambda: generate_input_preview(scenes["uav"], 400, 300),
+            "generate_input_preview[sentinel]": lambda: generate_input_preview(scenes["sentinel"], 400, 300),
+            "generate_output_mask_preview": lambda: generate_output_mask_preview(mask_path, 400, 300),
+            "generate_shapefile_preview": lambda: generate_shapefile_preview(shp_path, 400, 300),
+        })
+    return cases
+
+def measure(fn, repeats: int) -> dict:
+    fn()
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracer = StageTracer(trace_allocations=True)
+    with activate(tracer):
+        with trace_stage("case"):
+            fn()
+    return {'seconds': best, 'alloc_peak_mb': tracer.stages["case"].alloc_peak_mb}
+
+def run_suite(args) -> dict:
+    workdir = args.workdir or os.path.join(tempfile.gettempdir(), "codec_benchmarks")
+    os.makedirs(workdir, exist_ok=True)
+    models = _prepare_models(workdir, args.tile_size)
+
+    results = {}
+    for size in args.sizes:
+        scenes = _prepare_scenes(workdir, size, args.seed)
+        cases = build_cases(scenes, models, workdir, size, args)
+        mpix = size * size / 1e6
+        for name, fn in cases.items():
+            if args.only and not any(token in name for token in args.only):
+                continue
+            row = measure(fn, args.repeats)
+            results.setdefault(name, {})[str(size)] = {
+                'seconds': round(row['seconds'], 5),
+                'mpix_per_s': round(mpix / row['seconds'], 3),
+                'alloc_peak_mb': None if row['alloc_peak_mb'] is None else round(row['alloc_peak_mb'], 2),
+            }
+            print(f"{name:<34}{size:>6}px {mpix / row['seconds']:>10.2f} MPix/s", flush=True)
+
+    return {
+        'created': datetime.now().isoformat(timespec="seconds"),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'cpu_count': os.cpu_count()},
+        'tile_size': args.tile_size,
+        'batch_size': args.batch_size,
+        'repeats': args.repeats,
+        'results': results,
+    }
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for name, sizes in report['results'].items():
+        for size, row in sizes.items():
+            reference = baseline.get('results', {}).get(name, {}).get(size)
+            if reference is None:
+                continue
+            ratio = row['mpix_per_s'] / reference['mpix_per_s']
+            row['baseline_ratio'] = round(ratio, 3)
+            if ratio < 1.0 - threshold:
+                regressions.append((name, size, ratio))
+    return regressions
+
+def format_report(report: dict) -> str:
+    sizes = sorted({int(s) for rows in report['results'].values() for s in rows})
+    header = f"{'MPix/s':<34}" + "".join(f"{s:>10}" for s in sizes) + f"{'peak MB':>10}"
+    lines = [header, "-" * len(header)]
+    for name, rows in report['results'].items():
+        cells = []
+        for size in sizes:
+            row = rows.get(str(size))
+            if row is None:
+                cells.append(f"{'-':>10}")
+                continue
+            ratio = row.get('baseline_ratio')
+            mark = "" if ratio is None or ratio >= 1.0 else "*"
+            cells.append(f"{row['mpix_per_s']:>9.2f}{mark or ' '}")
+        peak = rows[str(sizes[-1])]['alloc_peak_mb'] if str(sizes[-1]) in rows else None
+        lines.append(f"{name:<34}" + "".join(cells) + f"{'-' if peak is None else f'{peak:.1f}':>10}")
+    lines.append("")
+    lines.append("* lebih lambat dari baseline; peak MB = alokasi puncak pada ukuran terbesar")
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark throughput pipeline deteksi pada citra sintetis.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 1024, 2048], help="Sisi citra sintetis (piksel)")
+    parser.add_argument("--tile-size", type=int, default=DEFAULT_TILE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", help="Jalankan hanya case yang namanya memuat salah satu teks ini")
+    parser.add_argument("--workdir", help="Direktori citra dan model sintetis (default: temp)")
+    parser.add_argument("--json", help="Simpan laporan sebagai JSON")
+    parser.add_argument("--baseline", help="Bandingkan dengan baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Penurunan throughput maksimum (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", help="Simpan hasil sebagai baseline JSON")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+
+    print()
+    print(format_report(report))
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if regressions:
+        print()
+        print(f"Regresi (> {args.threshold:.0%} lebih lambat dari baseline):")
+        for name, size, ratio in regressions:
+            print(f"  {name} @ {size}px: {ratio:.2f}x")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+"""Synthetic GeoTIFF scenes and a deterministic stand-in model for benchmarks.
+
+Scenes have water on the left and land on the right of a wavy shoreline
+with a few islands, so polygonization and coastline extraction have real
+work to do. The stand-in model is a single 1x1 convolution with fixed
+weights that separates water from land on the preprocessed input, which
+makes its masks deterministic and close to the synthetic ground truth.
+"""
+import os
+
+import numpy as np
+
+SCENE_CRS = "EPSG:32748"
+UAV_RESOLUTION = 0.1
+SENTINEL_RESOLUTION = 10.0
+
+# Mean reflectance (x10000) of B1..B12 incl. B8A for water and for land.
+_S2_WATER = np.array([900, 850, 800, 600, 500, 400, 350, 300, 280, 100, 10, 150, 100], dtype=np.float32)
+_S2_LAND = np.array([1100, 1000, 900, 1200, 1800, 2500, 2900, 3000, 3100, 900, 20, 2600, 1900], dtype=np.float32)
+
+_UAV_WATER = np.array([40, 90, 150], dtype=np.float32)
+_UAV_LAND = np.array([190, 170, 120], dtype=np.float32)
+
+def make_water_mask(height: int, width: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:height, :width].astype(np.float32)
+
+    shoreline = width * 0.45
+    for period, amplitude in ((height / 1.5, 0.06), (height / 5.0, 0.02), (height / 17.0, 0.005)):
+        shoreline = shoreline + width * amplitude * np.sin(2 * np.pi * yy / period + rng.uniform(0, 2 * np.pi))
+    water = xx < shoreline
+
+    # Islands off the coast and lagoons inland.
+    for _ in range(max(1, height * width // 400_000)):
+        cy, cx = rng.uniform(0, height), rng.uniform(0, width)
+        radius = rng.uniform(0.01, 0.04) * min(height, width)
+        blob = (yy - cy) ** 2 + (xx - cx) ** 2 < radius ** 2
+        water = np.where(blob, ~water, water)
+    return water
+
+def _profile(height: int, width: int, count: int, dtype: str, resolution: float) -> dict:
+    from rasterio.transform import from_origin
+
+    return {
+        "driver": "GTiff",
+        "height": height,
+        "width": width,
+        "count": count,
+        "dtype": dtype,
+        "crs": SCENE_CRS,
+        "transform": from_origin(500000, 9000000, resolution, resolution),
+        "tiled": True,
+        "blockxsize": 256,
+        "blockysize": 256,
+    }
+
+def write_synthetic_scene(path: str, kind: str = "uav", height: int = 1024, width: int = 1024, seed: int = 0) -> str:
+    import rasterio
+
+    rng = np.random.default_rng(seed)
+    water = make_water_mask(height, width, seed)
+
+    if kind == "uav":
+        water_means, land_means, noise, dtype, limit, resolution = _UAV_WATER, _UAV_LAND, 12.0, "uint8", 255, UAV_RESOLUTION
+    elif kind == "sentinel":
+        water_means, land_means, noise, dtype, limit, resolution = _S2_WATER, _S2_LAND, 60.0, "uint16", 10000, SENTINEL_RESOLUTION
+    else:
+        raise ValueError(f"Jenis citra sintetis tidak dikenali: {kind}")
+    band_count = len(water_means)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with rasterio.open(path, "w", **_profile(height, width, band_count, dtype, resolution)) as dst:
+        for band in range(band_count):
+            values = np.where(water, water_means[band], land_means[band]).astype(np.float32)
+            values += rng.normal(0, noise, size=(height, width)).astype(np.float32)
+            dst.write(np.clip(values, 0, limit).astype(dtype), band + 1)
+    return path
+
+def build_stub_model(path: str, channels: int, tile_size: int = 256) -> str:
+    # Two-class softmax over a fixed 1x1 convolution:
+    #   UAV (RGB in [0, 1]):     water score = blue - red
+    #   Sentinel (NDWI in [0, 1]): water score = ndwi - 0.5
+    import keras
+
+    inputs = keras.Input((tile_size, tile_size, channels))
+    logits = keras.layers.Conv2D(2, 1, name="stub")(inputs)
+    outputs = keras.layers.Softmax()(logits)
+    model = keras.Model(inputs, outputs)
+
+    kernel = np.zeros((1, 1, channels, 2), dtype=np.float32)
+    bias = np.zeros(2, dtype=np.float32)
+    if channels == 1:
+        kernel[0, 0, 0] = [-8.0, 8.0]
+        bias[:] = [4.0, -4.0]
+    else:
+        kernel[0, 0, 0] = [8.0, -8.0]
+        kernel[0, 0, 2] = [-8.0, 8.0]
+    model.get_layer("stub").set_weights([kernel, bias])
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    model.save(path)
+    return path
@@ -0,0 +1,301 @@
+"""Headless batch detection, without the Qt GUI.
+
+    python cli.py data/scenes/ --pattern "*.tif" --workers 4 --output-dir output/nightly
+    python cli.py "data/**/*_S2.tif" --model sentinel --manifest output/nightly/manifest.json
+
+Every worker process loads each model once and reuses it for all scenes it
+receives. With ``--model auto`` the model is chosen per scene from its band
+count. Outputs mirror the scenes' folders below their common input root.
+A summary manifest (one record per scene) is written at the end.
+"""
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import PIPELINED_DETECTION
+from utils.tracing import json_safe
+
+logger = logging.getLogger("codec.cli")
+
+MODEL_CHOICES = {"uav": "✈️ UAV", "sentinel": "🛰️ Sentinel-2"}
+SCENE_EXTENSIONS = (".tif", ".tiff")
+
+# Per-process state, filled by _init_worker.
+_worker_options = {}
+_detectors = {}
+
+def find_scenes(inputs, pattern: str = "*.tif", recursive: bool = False):
+    scenes = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "**", pattern) if recursive else os.path.join(item, pattern),
+                                recursive=recursive)
+        elif glob.has_magic(item):
+            matches = glob.glob(item, recursive=True)
+        else:
+            matches = [item]
+        scenes.extend(os.path.abspath(m) for m in matches if m.lower().endswith(SCENE_EXTENSIONS))
+    return sorted(dict.fromkeys(scenes))
+
+def scene_output_dir(input_path: str, options: dict) -> str:
+    # Scenes keep their folder layout below the common input root, so
+    # same-named scenes from different folders do not overwrite each other.
+    relative = os.path.relpath(os.path.dirname(input_path), options["input_root"])
+    return os.path.normpath(os.path.join(options["output_dir"], relative))
+
+def find_output_collisions(scenes, options: dict) -> dict:
+    # Outputs are named after the scene's file name without extension, so
+    # e.g. a.tif and a.tiff in one folder would still share them.
+    owners, collisions = {}, {}
+    for path in scenes:
+        key = os.path.join(scene_output_dir(path, options), os.path.splitext(os.path.basename(path))[0])
+        if key in owners:
+            collisions[path] = owners[key]
+        else:
+            owners[key] = path
+    return collisions
+
+def resolve_model_type(input_path: str, model: str):
+    from utils.helper import read_raster_info, choose_model_by_band_count, validate_model_selection
+
+    band_count, err = read_raster_info(input_path)
+    if err:
+        raise ValueError(f"Gagal membaca citra: {err}")
+
+    model_type = choose_model_by_band_count(band_count) if model == "auto" else MODEL_CHOICES[model]
+    if model_type is None:
+        raise ValueError(f"Jumlah band ({band_count}) tidak cocok dengan model manapun")
+
+    is_valid, message = validate_model_selection(model_type, band_count)
+    if not is_valid:
+        raise ValueError(message)
+    return model_type
+
+def _init_worker(options: dict) -> None:
+    from utils.parallel_inference import limit_inference_threads
+
+    limit_inference_threads(options.get("threads_per_worker"))
+    logging.basicConfig(level=options.get("log_level", logging.WARNING),
+                        format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    _worker_options.clear()
+    _worker_options.update(options)
+
+def _get_detector(model_type: str):
+    detector = _detectors.get(model_type)
+    if detector is None:
+        from models.coastline_detector import CoastlineDetectorFactory
+
+        detector = CoastlineDetectorFactory.create_detector(
+            model_type,
+            batch_size=_worker_options["batch_size"],
+            backend=_worker_options.get("backend"),
+            precision=_worker_options.get("precision"),
+        )
+        model_path = _worker_options.get("model_paths", {}).get(model_type)
+        if model_path:
+            detector.model_path = model_path
+        detector.coastline_method = _worker_options.get("coastline", detector.coastline_method)
+        detector.merge_lines = _worker_options.get("merge_lines", detector.merge_lines)
+        detector.simplify_pixels = _worker_options.get("simplify", detector.simplify_pixels)
+        detector.polygonize_workers = _worker_options.get("polygonize_workers", detector.polygonize_workers)
+        if not detector.load_model():
+            raise RuntimeError(f"Gagal memuat model {model_type} ({detector.model_path})")
+        _detectors[model_type] = detector
+    return detector
+
+def process_scene(input_path: str) -> dict:
+    from core.file_handler import FileHandler
+    from core.pipeline import run_detection
+    from core.overviews import overview_builder
+
+    record = {
+        "input": input_path,
+        "model_type": None,
+        "status": "failed",
+        "error": None,
+        "tiff_path": None,
+        "shapefile_path": None,
+        "elapsed_s": None,
+        "worker_pid": os.getpid(),
+    }
+    start = time.perf_counter()
+    try:
+        model_type = resolve_model_type(input_path, _worker_options["model"])
+        record["model_type"] = model_type
+        detector = _get_detector(model_type)
+
+        file_handler = FileHandler(output_dir=scene_output_dir(input_path, _worker_options))
+        streaming_mode = _worker_options["streaming"]
+        if streaming_mode == "auto":
+            streaming = PIPELINED_DETECTION or file_handler.requires_streaming(input_path)
+        else:
+            streaming = streaming_mode == "on"
+
+        result = run_detection(detector, input_path, file_handler, streaming=streaming)
+        # The mask's overviews are part of the scene's output.
+        overview_builder.wait()
+        record.update({
+            "status": "ok",
+            "tiff_path": result.tiff_path,
+            "shapefile_path": result.shapefile_path,
+            "meta": json_safe(result.meta),
+        })
+    except Exception as e:
+        logger.error(f"Deteksi gagal untuk {input_path}: {str(e)}")
+        record["error"] = str(e)
+    record["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return record
+
+def run_batch(scenes, options: dict, workers: int = 1):
+    records = []
+    if workers <= 1:
+        _init_worker(options)
+        for path in scenes:
+            records.append(process_scene(path))
+            _report(records[-1], len(records), len(scenes))
+        return records
+
+    # spawn: a forked child would inherit TensorFlow/GDAL state from the parent.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(options,)) as pool:
+        futures = {pool.submit(process_scene, path): path for path in scenes}
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                record = {"input": futures[future], "status": "failed", "error": f"Worker gagal: {str(e)}"}
+            records.append(record)
+            _report(record, len(records), len(scenes))
+
+    order = {path: i for i, path in enumerate(scenes)}
+    records.sort(key=lambda r: order[r["input"]])
+    return records
+
+def _report(record: dict, done: int, total: int) -> None:
+    if record["status"] == "ok":
+        print(f"[{done}/{total}] OK     {record['input']} -> {record['tiff_path']} ({record['elapsed_s']:.1f}s)")
+    else:
+        print(f"[{done}/{total}] GAGAL  {record['input']}: {record['error']}")
+
+def write_manifest(path: str, records, options: dict, elapsed_s: float) -> None:
+    manifest = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "options": json_safe(options),
+        "elapsed_s": round(elapsed_s, 3),
+        "total": len(records),
+        "succeeded": sum(r["status"] == "ok" for r in records),
+        "failed": sum(r["status"] != "ok" for r in records),
+        "scenes": records,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+def main(argv=None) -> int:
+    from config.settings import (
+        DEFAULT_BATCH_SIZE, OUTPUT_DIR, COASTLINE_METHOD, COASTLINE_MERGE_LINES, COASTLINE_SIMPLIFY_PIXELS,
+        POLYGONIZE_WORKERS
+    )
+    from models.backends import BACKENDS, PRECISIONS
+
+    parser = argparse.ArgumentParser(description="Deteksi garis pantai secara batch tanpa GUI.")
+    parser.add_argument("inputs", nargs="+", help="File GeoTIFF, direktori, atau pola glob")
+    parser.add_argument("--pattern", default="*.tif", help="Pola file di dalam direktori (default: *.tif)")
+    parser.add_argument("--recursive", action="store_true", help="Cari file di subdirektori")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--model", choices=["auto", *MODEL_CHOICES], default="auto",
+                        help="auto memilih model dari jumlah band tiap citra")
+    parser.add_argument("--uav-model", help="Path model UAV (default: models/uav.h5)")
+    parser.add_argument("--sentinel-model", help="Path model Sentinel-2 (default: models/sentinel.h5)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS))
+    parser.add_argument("--precision", choices=PRECISIONS)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--streaming", choices=["auto", "on", "off"], default="auto")
+    parser.add_argument("--coastline", choices=["polygons", "contours"], default=COASTLINE_METHOD,
+                        help="Metode ekstraksi garis pantai (contours: lebih cepat, tanpa poligon)")
+    parser.add_argument("--simplify", type=float, default=COASTLINE_SIMPLIFY_PIXELS,
+                        help="Toleransi penyederhanaan garis pantai dalam piksel (default: tidak disederhanakan)")
+    parser.add_argument("--merge-lines", action="store_true", default=COASTLINE_MERGE_LINES,
+                        help="Gabungkan garis pantai yang bersambung menjadi satu fitur")
+    parser.add_argument("--workers", type=int, default=1, help="Jumlah proses worker")
+    parser.add_argument("--threads-per-worker", type=int,
+                        help="Batas thread inferensi per worker (default: semua core dibagi jumlah worker)")
+    parser.add_argument("--polygonize-workers", type=int,
+                        help="Jumlah proses poligonisasi per worker (default: 1 bila --workers > 1)")
+    parser.add_argument("--manifest", help="Path manifest JSON (default: <output-dir>/manifest_<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    scenes = find_scenes(args.inputs, args.pattern, args.recursive)
+    if not scenes:
+        print("Tidak ada citra yang ditemukan.")
+        return 2
+
+    input_root = os.path.commonpath([os.path.dirname(path) for path in scenes])
+    workers = max(1, min(args.workers, len(scenes)))
+    threads = args.threads_per_worker
+    if threads is None and workers > 1:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+    # Batch workers already use the cores; a strip pool in each would
+    # multiply the process count.
+    polygonize_workers = args.polygonize_workers
+    if polygonize_workers is None:
+        polygonize_workers = 1 if workers > 1 else POLYGONIZE_WORKERS
+
+    options = {
+        "model": args.model,
+        "model_paths": {
+            model_type: os.path.abspath(path)
+            for model_type, path in ((MODEL_CHOICES["uav"], args.uav_model), (MODEL_CHOICES["sentinel"], args.sentinel_model))
+            if path
+        },
+        "backend": args.backend,
+        "precision": args.precision,
+        "batch_size": args.batch_size,
+        "streaming": args.streaming,
+        "coastline": args.coastline,
+        "merge_lines": args.merge_lines,
+        "simplify": args.simplify,
+        "output_dir": os.path.abspath(args.output_dir),
+        "input_root": input_root,
+        "threads_per_worker": threads,
+        "polygonize_workers": polygonize_workers,
+        "log_level": logging.INFO if args.verbose else logging.WARNING,
+    }
+
+    os.makedirs(options["output_dir"], exist_ok=True)
+    print(f"{len(scenes)} citra, {workers} worker")
+    collisions = find_output_collisions(scenes, options)
+    for path, owner in collisions.items():
+        print(f"GAGAL  {path}: nama keluaran bentrok dengan {owner}")
+    start = time.perf_counter()
+    records = run_batch([path for path in scenes if path not in collisions], options, workers)
+    records += [
+        {"input": path, "status": "failed", "error": f"Nama keluaran bentrok dengan {owner}"}
+        for path, owner in collisions.items()
+    ]
+    order = {path: i for i, path in enumerate(scenes)}
+    records.sort(key=lambda r: order[r["input"]])
+    elapsed = time.perf_counter() - start
+
+    manifest_path = args.manifest or os.path.join(
+        options["output_dir"], f"manifest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    write_manifest(manifest_path, records, options, elapsed)
+
+    failed = sum(r["status"] != "ok" for r in records)
+    print(f"Selesai dalam {elapsed:.1f}s: {len(records) - failed} berhasil, {failed} gagal. Manifest: {manifest_path}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -15,6 +15,64 @@ SENTINEL2_BANDS = {
     'B8A': 8, 'B9': 9, 'B10': 10, 'B11': 11, 'B12': 12
 }
 
+# UAV radiometric enhancement, applied in order (utils/preprocess.py).
+# Stages whose parameters make them an identity are skipped. In streaming
+# mode each active contrast stage adds one read pass for its scene mean.
+UAV_ENHANCEMENT = [
+    ("stretch", {}),
+    ("gamma", {"gamma": 1.0}),
+    ("brightness", {"offset": 0.0}),
+    ("contrast", {"amount": 0.0}),
+    ("saturation", {"factor": 1.68}),
+]
+
+# Approximate percentiles (utils/raster_stats.py): bins for non-8/16-bit
+# data, and how many file/band histograms stay cached.
+PERCENTILE_HISTOGRAM_BINS = 4096
+RASTER_STATS_CACHE_SIZE = 64
+
+# Previews read at label resolution (overviews when present); their
+# stretch statistics come from at most this many pixels per band.
+PREVIEW_RESAMPLING = "average"
+PREVIEW_STATS_MAX_PIXELS = 2048 * 2048
+
+# Mask previews are indexed-colour images: class id -> RGB (ids not listed
+# are black). Float rasters (probabilities in 0..1) are drawn through a
+# linear ramp between these colours instead.
+MASK_COLOR_TABLE = {
+    0: (160, 160, 160),
+    1: (0, 102, 204),
+}
+PROBABILITY_COLOR_RAMP = [(160, 160, 160), (0, 102, 204)]
+
+# Masks of at least POLYGONIZE_TILED_MIN_PIXELS are polygonized as strips
+# of POLYGONIZE_STRIP_ROWS rows in a pool of POLYGONIZE_WORKERS processes,
+# and polygons crossing strip seams are merged (utils/postprocess.py).
+# The pool is started once per process and reused; batch CLI workers
+# polygonize in-process unless --polygonize-workers says otherwise.
+POLYGONIZE_WORKERS = 4
+POLYGONIZE_STRIP_ROWS = 1024
+POLYGONIZE_TILED_MIN_PIXELS = 8192 * 8192
+
+# Coastline extraction: "polygons" takes the outer rings of the water
+# polygons; "contours" traces them straight from the mask with OpenCV
+# (faster, no polygons, lines through boundary pixel centres).
+COASTLINE_METHOD = "polygons"
+
+# Optional coastline post-stage (utils/postprocess.simplify_coastline):
+# merge lines that continue each other into single features, and simplify
+# (topology-preserving) with a tolerance of this many mask pixels; None
+# disables simplification. The vertex reduction goes into the metadata.
+COASTLINE_MERGE_LINES = False
+COASTLINE_SIMPLIFY_PIXELS = None
+
+# Row-chunk size of the spectral index kernels (utils/spectral.py).
+SPECTRAL_CHUNK_PIXELS = 1 << 18
+
+# Indices fed to the Sentinel-2 model, one input channel each, in order
+# (names from utils/spectral.py). Only their bands are read from a scene.
+SENTINEL2_INDICES = ["ndwi"]
+
 WINDOW_WIDTH = 1200
 WINDOW_HEIGHT = 650
 LEFT_PANEL_WIDTH = 450
@@ -24,4 +82,65 @@ ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets")
 
 MODEL_TYPES = ["Pilih Model","✈️ UAV", "🛰️ Sentinel-2"]
 
+DEFAULT_TILE_SIZE = 256
+DEFAULT_BATCH_SIZE = 8
+
+STREAMING_THRESHOLD_MB = 500
+STREAM_WINDOW_PIXELS = 2048 * 2048
+PIPELINE_QUEUE_DEPTH = 2
+PIPELINED_DETECTION = True
+
+MODEL_CACHE_BUDGET_MB = 1024
+INFERENCE_NUM_THREADS = None
+# Worker processes for tile inference; 1 keeps inference in-process.
+# Threads per worker default to the cores divided among the workers.
+INFERENCE_WORKERS = 1
+INFERENCE_THREADS_PER_WORKER = None
+# Inference backend per detector: "keras", "savedmodel", "tflite" or "onnx".
+# Non-Keras models are expected next to the .h5 file (see
+# models.backends.model_path_for_backend) and are produced with
+# `python -m models.backends convert`.
+DETECTOR_BACKENDS = {
+    "✈️ UAV": "keras",
+    "🛰️ Sentinel-2": "keras",
+}
+# "float32", "float16" or "int8"; reduced precision requires the tflite
+# backend and a model made with models.quantization (see
+# benchmarks/precision_report.py for the speed/accuracy trade-off).
+DETECTOR_PRECISIONS = {
+    "✈️ UAV": "float32",
+    "🛰️ Sentinel-2": "float32",
+}
+MODEL_WARMUP = True
+
+STARTUP_PRELOAD_MODULES = [
+    "numpy", "rasterio", "cv2", "shapely", "geopandas",
+    "utils.image_processor", "models.coastline_detector", "keras"
+]
+
+# Per-stage timing/memory of each detection goes into its metadata and a
+# JSON run report next to the outputs. Allocation tracing (tracemalloc)
+# slows numpy-heavy stages noticeably, so it is off by default.
+WRITE_RUN_REPORT = True
+TRACE_ALLOCATIONS = False
+
+MASK_COMPRESSION = "deflate"
+MASK_PREDICTOR = 2
+MASK_BLOCK_SIZE = DEFAULT_TILE_SIZE
+MASK_WRITE_COG = False
+GDAL_NUM_THREADS = "ALL_CPUS"
+
+# Overview pyramids (core/overviews.py), built in a background thread on
+# detection masks once saved and on inputs of at least OVERVIEW_INPUT_MIN_MB
+# when first opened. External overviews go to a .ovr file next to the
+# raster and leave the raster itself unmodified.
+BUILD_MASK_OVERVIEWS = True
+BUILD_INPUT_OVERVIEWS = True
+OVERVIEW_INPUT_MIN_MB = 100
+OVERVIEW_EXTERNAL = True
+OVERVIEW_MIN_SIZE = 256
+OVERVIEW_MASK_RESAMPLING = "nearest"
+OVERVIEW_IMAGE_RESAMPLING = "average"
+OVERVIEW_COMPRESSION = "DEFLATE"
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
\ No newline at end of file
@@ -1,7 +1,5 @@
-from models.coastline_detector import CoastlineDetectorFactory, DetectionThread
-from utils.helper import choose_model_by_band_count, show_warning_dialog, load_raster_image, validate_model_selection
-from config.settings import SUPPORTED_FORMATS
-from models.coastline_detector import DetectionThread
+from utils.helper import choose_model_by_band_count, show_warning_dialog, read_raster_info, validate_model_selection
+from config.settings import SUPPORTED_FORMATS, PIPELINED_DETECTION
 
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
 
@@ -10,7 +8,7 @@ class AppController:
         self.main_window = main_window
         self.current_detector = None
         self.input_image_path = None
-        self.input_image_array = None
+        self.input_band_count = 0
         self.detection_thread = None
         self.file_handler = main_window.file_handler
 
@@ -30,14 +28,16 @@ class AppController:
             self.input_image_path = file_path
             self.main_window.fileSectionComponent.setFilePath(file_path)
 
-            image_array, band_count, error = load_raster_image(file_path)
+            # Only the header is read here; pixels are read by the detection
+            # pipeline, which may stream scenes that do not fit in memory.
+            band_count, error = read_raster_info(file_path)
             if error:
-                self.input_image_array = None
+                self.input_band_count = 0
                 self.main_window.fileSectionComponent.setBandInfo("Gagal membaca citra")
                 print(f"Error loading image: {error}")
                 return
 
-            self.input_image_array = image_array
+            self.input_band_count = band_count
             self.main_window.fileSectionComponent.setBandInfo(f"Jumlah band terdeteksi: {band_count}")
 
             model_type = choose_model_by_band_count(band_count)
@@ -49,17 +49,24 @@ class AppController:
 
             self.main_window.outputPanelComponent.updateInputPreview(file_path)
 
+            # Later zoomed-out reads of a large input come from its overviews.
+            from core.overviews import overview_builder
+            overview_builder.ensure_input_overviews(file_path)
+
     def clearFile(self):
+        from core.overviews import overview_builder
+        # Overviews still queued for inputs are no longer worth building.
+        overview_builder.cancel("inputs")
         self.main_window.fileSectionComponent.clearFile()
         self.input_image_path = None
-        self.input_image_array = None
+        self.input_band_count = 0
         self.main_window.outputPanelComponent.inputPreviewLabel.clear()
         self.main_window.outputPanelComponent.outputImageLabel.clear()
         self.main_window.outputPanelComponent.outputShapefile.clear()
         self.file_handler.clean_files(parent_widget=self.main_window)
 
     def onModelChanged(self, model_type):
-        band_count = self.input_image_array.shape[2] if self.input_image_array is not None else 0
+        band_count = self.input_band_count
 
         if band_count == 0:
             show_warning_dialog(
@@ -74,6 +81,21 @@ class AppController:
             show_warning_dialog(self.main_window, "Peringatan Model Tidak Sesuai", warning_msg)
             return
 
+        # The detector stack pulls in rasterio, GeoPandas and OpenCV; it is
+        # imported on first use (or earlier by the startup preloader).
+        from models.coastline_detector import CoastlineDetectorFactory
+
+        if self.detection_thread is not None and self.detection_thread.isRunning():
+            show_warning_dialog(
+                self.main_window,
+                "Deteksi Sedang Berjalan",
+                "Model tidak dapat diganti selama proses deteksi berjalan."
+            )
+            return
+
+        # The previous detector's inference pool/session goes with it.
+        if self.current_detector is not None:
+            self.current_detector.close()
         self.current_detector = CoastlineDetectorFactory.create_detector(model_type)
         if self.current_detector:
             loaded = self.current_detector.load_model()
@@ -88,29 +110,34 @@ class AppController:
         if not self.current_detector or not self.current_detector.is_loaded:
             print("Model belum dipilih atau gagal dimuat")
             return
-        if self.input_image_array is None or self.input_image_path is None:
+        if not self.input_band_count or self.input_image_path is None:
             print("Input image belum dipilih atau gagal dimuat")
             return
 
+        from core.detection_thread import DetectionThread
+
         self.main_window.processSectionComponent.setProcessingState(True)
 
         self.detection_thread = DetectionThread(
             self.current_detector,
             self.input_image_path,
-            self.input_image_array
+            streaming=PIPELINED_DETECTION or self.file_handler.requires_streaming(self.input_image_path)
         )
         self.detection_thread.detectionFinished.connect(self.onDetectionFinished)
         self.detection_thread.detectionFailed.connect(self.onDetectionFailed)
         self.detection_thread.start()
 
-    def onDetectionFinished(self, output_path, meta):
+    def onDetectionFinished(self, result):
         self.main_window.processSectionComponent.setProcessingState(False)
-        print("Deteksi selesai dengan metadata:", meta)
-        print(f"Hasil deteksi disimpan di: {output_path}")
-        self.main_window.outputPanelComponent.updateOutputPreview(output_path)
-        shapefile_path = meta.get('shapefile_path', None) if meta else None
-        if shapefile_path:
-            self.main_window.outputPanelComponent.updateShapefilePreview(shapefile_path)
+        print("Deteksi selesai dengan metadata:", result.meta)
+        print(f"Hasil deteksi disimpan di: {result.tiff_path}")
+        # Previews are drawn from the in-memory result, not re-read from disk;
+        # a streamed result has no whole mask and is previewed from its TIFF.
+        self.main_window.outputPanelComponent.updateOutputPreview(
+            result.mask if result.mask is not None else result.tiff_path
+        )
+        if result.has_coastline:
+            self.main_window.outputPanelComponent.updateShapefilePreview(result.coastline)
 
     def onDetectionFailed(self, error_msg):
         self.main_window.processSectionComponent.setProcessingState(False)
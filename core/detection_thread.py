@@ -0,0 +1,30 @@
+import logging
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from core.file_handler import FileHandler
+from core.pipeline import run_detection
+
+logger = logging.getLogger(__name__)
+
+class DetectionThread(QThread):
+    # Emits the DetectionResult (mask, vectors, output paths and meta).
+    detectionFinished = pyqtSignal(object)
+    detectionFailed = pyqtSignal(str)
+
+    def __init__(self, detector, input_image_path, streaming: bool = False):
+        super().__init__()
+        self.detector = detector
+        self.input_image_path = input_image_path
+        self.streaming = streaming
+        self.file_handler = FileHandler()
+
+    def run(self):
+        try:
+            result = run_detection(
+                self.detector, self.input_image_path, self.file_handler, streaming=self.streaming, water_class=1
+            )
+            self.detectionFinished.emit(result)
+
+        except Exception as e:
+            logger.error(f"Error during detection: {str(e)}")
+            self.detectionFailed.emit(str(e))
@@ -1,20 +1,20 @@
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, TYPE_CHECKING
 import numpy as np
-import rasterio
-import geopandas as gpd
 import shutil, zipfile, logging
 
-from PyQt5.QtWidgets import QFileDialog
+from config.settings import STREAMING_THRESHOLD_MB
 
-from utils.postprocess import extract_coastline
+if TYPE_CHECKING:
+    import geopandas as gpd
+    from core.raster_writer import MaskWriter
 
 logger = logging.getLogger(__name__)
 
 class FileHandler:
     def __init__(self, output_dir: str = "./output"):
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
         self.current_file_path = None
     
     def validate_file(self, file_path: str) -> tuple[bool, Optional[str]]:
@@ -29,8 +29,8 @@ class FileHandler:
             
             file_size_mb = path.stat().st_size / (1024 * 1024)
 
-            if file_size_mb > 500:
-                return False, f"Ukuran file terlalu besar ({file_size_mb:.2f} MB). Maksimal 500 MB. \nSilakan pilih file yang kurang dari 500 MB."
+            if file_size_mb > STREAMING_THRESHOLD_MB:
+                return True, f"Ukuran file sangat besar ({file_size_mb:.2f} MB). Citra akan diproses bertahap per window (streaming) dan proses deteksi akan memakan waktu lebih lama."
             elif file_size_mb >= 100:
                 return True, f"Ukuran file besar ({file_size_mb:.2f} MB). Proses deteksi mungkin akan memakan waktu lebih lama."
 
@@ -44,6 +44,16 @@ class FileHandler:
             self.current_file_path = file_path
         return is_valid, message
         
+    def requires_streaming(self, file_path: Optional[str] = None) -> bool:
+        if file_path is None:
+            file_path = self.current_file_path
+        if file_path is None:
+            return False
+        try:
+            return Path(file_path).stat().st_size / (1024 * 1024) > STREAMING_THRESHOLD_MB
+        except OSError:
+            return False
+        
     def get_file_info(self, file_path: Optional[str] = None) -> Dict[str, Any]:
         if file_path is None:
             file_path = self.current_file_path
@@ -74,32 +84,26 @@ class FileHandler:
         base_name = input_path.stem
         return f"{base_name}_{suffix}{extension}"
     
-    def save_tiff(self, data: np.ndarray, profile: dict, filename: Optional[str] = None) -> Optional[str]:
-        try:
-            if filename is None:
-                filename = self.generate_output_filename("result", ".tif")
-
-            output_path = self.output_dir / filename
+    def open_mask_writer(self, profile: dict, filename: Optional[str] = None, **options) -> "MaskWriter":
+        from core.raster_writer import MaskWriter
+        if filename is None:
+            filename = self.generate_output_filename("result", ".tif")
+        return MaskWriter(self.output_dir / filename, profile, **options)
 
-            profile_copy = profile.copy()
-            profile_copy.update({
-                "count": 1,
-                "dtype": "uint8",
-                "compress": "lzw"
-            })
-
-            with rasterio.open(output_path, "w", **profile_copy) as dst:
-                dst.write(data.astype("uint8"), 1)
+    def save_tiff(self, data: np.ndarray, profile: dict, filename: Optional[str] = None, **options) -> Optional[str]:
+        try:
+            with self.open_mask_writer(profile, filename, **options) as writer:
+                writer.write(data)
 
-            logger.info(f"TIFF saved to: {output_path}")
-            return str(output_path)
+            logger.info(f"TIFF saved to: {writer.path}")
+            return str(writer.path)
         except Exception as e:
             logger.error(f"Error saving TIFF: {str(e)}")
             return None
     
-    def save_coastline_shapefile(self, polygons_gdf: gpd.GeoDataFrame, water_class: int = 1, filename: Optional[str] = None) -> Optional[str]:
+    def save_coastline_shapefile(self, coastline_gdf: "gpd.GeoDataFrame", filename: Optional[str] = None) -> Optional[str]:
+        # Takes the coastline already extracted in postprocess (DetectionResult.coastline).
         try:
-            coastline_gdf = extract_coastline(polygons_gdf, water_class)
             if coastline_gdf is None or coastline_gdf.empty:
                 logger.warning("No coastline extracted from polygons.")
                 return None
@@ -118,7 +122,10 @@ class FileHandler:
             return None
         
     def clean_files(self, parent_widget=None):
+        from core.overviews import overview_builder
         try:
+            # Outputs may still be getting their overviews.
+            overview_builder.wait(self.output_dir.glob("*"))
             output_files = list(self.output_dir.glob("*"))
             if not output_files:
                 return
@@ -142,7 +149,10 @@ class FileHandler:
 
 
     def download_and_clear_outputs(self, parent_widget=None) -> Optional[str]:
+        from PyQt5.QtWidgets import QFileDialog
+        from core.overviews import overview_builder
         try:
+            overview_builder.wait(self.output_dir.glob("*"))
             output_files = list(self.output_dir.glob("*"))
             if not output_files:
                 return None
@@ -0,0 +1,148 @@
+import os
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Iterable, List, Optional
+
+import rasterio
+from rasterio.enums import Resampling
+
+from config.settings import (
+    OVERVIEW_EXTERNAL, OVERVIEW_MIN_SIZE, OVERVIEW_COMPRESSION, OVERVIEW_INPUT_MIN_MB,
+    OVERVIEW_IMAGE_RESAMPLING, BUILD_INPUT_OVERVIEWS, GDAL_NUM_THREADS
+)
+
+logger = logging.getLogger(__name__)
+
+def overview_factors(width: int, height: int, min_size: int = OVERVIEW_MIN_SIZE) -> List[int]:
+    # Power-of-two levels down to the first one whose longer side is
+    # below min_size.
+    factors = []
+    factor = 2
+    while max(width, height) / factor >= min_size:
+        factors.append(factor)
+        factor *= 2
+    return factors
+
+def has_overviews(path: str) -> bool:
+    with rasterio.open(path) as src:
+        return bool(src.overviews(1))
+
+def build_overviews(path: str, resampling: str = "average", external: bool = OVERVIEW_EXTERNAL,
+                    min_size: int = OVERVIEW_MIN_SIZE) -> List[int]:
+    path = str(path)
+    with rasterio.open(path) as src:
+        if src.overviews(1):
+            return src.overviews(1)
+        factors = overview_factors(src.width, src.height, min_size)
+    if not factors:
+        return []
+
+    env = {"COMPRESS_OVERVIEW": OVERVIEW_COMPRESSION, "GDAL_NUM_THREADS": GDAL_NUM_THREADS}
+    if not external:
+        with rasterio.Env(**env), rasterio.open(path, "r+") as dst:
+            dst.build_overviews(factors, Resampling[resampling])
+        return factors
+
+    # TIFF_USE_OVR writes the pyramid to <path>.ovr and leaves the raster
+    # untouched. It is built through a hard link under a scratch name and
+    # renamed into place, so a reader never picks up a half-written .ovr.
+    root, ext = os.path.splitext(path)
+    alias = f"{root}.partial{ext}"
+    try:
+        os.link(path, alias)
+    except OSError:
+        alias = path
+    try:
+        with rasterio.Env(TIFF_USE_OVR=True, **env), rasterio.open(alias, "r+") as dst:
+            dst.build_overviews(factors, Resampling[resampling])
+        if alias != path:
+            os.replace(f"{alias}.ovr", f"{path}.ovr")
+    finally:
+        if alias != path:
+            for scratch in (alias, f"{alias}.ovr", f"{alias}.aux.xml"):
+                if os.path.exists(scratch):
+                    os.remove(scratch)
+    return factors
+
+class OverviewBuilder:
+    # Builds run in submission order, one at a time per queue; a path that
+    # is already queued or being built is not queued again. Outputs are
+    # built on a background thread. rasterio holds the GIL while GDAL
+    # builds a pyramid, which for a full-scene input would stall every
+    # other thread (the GUI included), so inputs are built in a separate
+    # process, and waiting for outputs never waits for them.
+    def __init__(self):
+        self._executors = {}
+        self._process_pool = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, path: str, resampling: str = "average", external: bool = OVERVIEW_EXTERNAL,
+               queue: str = "outputs") -> Future:
+        key = os.path.abspath(path)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and not pending[1].done():
+                return pending[1]
+            executor = self._executors.get(queue)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"overviews-{queue}")
+                self._executors[queue] = executor
+            build = self._build_in_process if queue == "inputs" else build_overviews
+            future = executor.submit(build, str(path), resampling, external)
+            future.add_done_callback(partial(self._log_build, str(path), resampling))
+            self._pending[key] = (queue, future)
+        return future
+
+    def _build_in_process(self, path: str, resampling: str, external: bool) -> List[int]:
+        # Called from the inputs thread only; builds stay queued there, where
+        # they can still be cancelled.
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        return self._process_pool.submit(build_overviews, path, resampling, external).result()
+
+    def _log_build(self, path: str, resampling: str, future: Future) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.warning(f"Gagal membuat overview untuk {path}: {str(error)}")
+        elif future.result():
+            logger.info(f"Overviews {future.result()} ({resampling}) built for: {path}")
+
+    def wait(self, paths: Optional[Iterable[str]] = None, timeout: Optional[float] = None) -> None:
+        # Only the builds of `paths` when given, otherwise every pending one.
+        with self._lock:
+            if paths is None:
+                futures = [future for _, future in self._pending.values()]
+            else:
+                keys = {os.path.abspath(p) for p in paths}
+                futures = [future for key, (_, future) in self._pending.items() if key in keys]
+        wait(futures, timeout=timeout)
+        with self._lock:
+            self._pending = {key: pending for key, pending in self._pending.items() if not pending[1].done()}
+
+    def cancel(self, queue: str) -> None:
+        # Drops the builds of `queue` that have not started yet.
+        with self._lock:
+            for pending_queue, future in self._pending.values():
+                if pending_queue == queue:
+                    future.cancel()
+
+    def ensure_input_overviews(self, path: str) -> Optional[Future]:
+        # Inputs get overviews on first open only when they are large enough
+        # for zoomed-out reads to hurt and do not have any yet.
+        if not BUILD_INPUT_OVERVIEWS:
+            return None
+        try:
+            if os.path.getsize(path) / (1024 * 1024) < OVERVIEW_INPUT_MIN_MB or has_overviews(path):
+                return None
+        except Exception as e:
+            logger.warning(f"Gagal memeriksa overview untuk {path}: {str(e)}")
+            return None
+        return self.submit(path, OVERVIEW_IMAGE_RESAMPLING, queue="inputs")
+
+overview_builder = OverviewBuilder()
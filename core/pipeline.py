@@ -0,0 +1,338 @@
+import os
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import rasterio
+
+from config.settings import (
+    DEFAULT_TILE_SIZE, STREAM_WINDOW_PIXELS, PIPELINE_QUEUE_DEPTH, WRITE_RUN_REPORT,
+    BUILD_MASK_OVERVIEWS, OVERVIEW_MASK_RESAMPLING
+)
+from utils.preprocess import iter_stream_windows
+from utils.postprocess import polygonize_strip, merge_strip_polygons, polygons_to_gdf
+from core.raster_writer import MaskWriter
+from core.overviews import overview_builder
+from models.registry import model_registry
+from models.detection_result import DetectionResult
+from utils.tracing import StageTracer, activate, trace_stage, write_run_report
+
+logger = logging.getLogger(__name__)
+
+def iter_smoothed_strips(strips, halo: int, postprocess_mask):
+    # Strips arrive top to bottom. Each one is postprocessed together with
+    # `halo` rows borrowed from its neighbours, so morphology near a strip
+    # seam sees the same pixels it would on the whole mask. Only the last
+    # strip may be shorter than the halo: the scene ends right below it, so
+    # all of it is the context its neighbour above needs.
+    if halo <= 0:
+        for window, mask in strips:
+            yield window, postprocess_mask(mask)
+        return
+
+    prev_window, prev_mask, prev_tail = None, None, None
+
+    def smooth(parts, core_rows):
+        start = 0 if prev_tail is None else len(prev_tail)
+        head = [] if prev_tail is None else [prev_tail]
+        return postprocess_mask(np.concatenate(head + parts))[start:start + core_rows]
+
+    for window, mask in strips:
+        if prev_mask is not None:
+            if prev_mask.shape[0] < halo:
+                raise ValueError(f"Tinggi strip ({prev_mask.shape[0]}) lebih kecil dari halo ({halo}).")
+            yield prev_window, smooth([prev_mask, mask[:halo]], prev_mask.shape[0])
+            prev_tail = prev_mask[-halo:]
+        prev_window, prev_mask = window, mask
+
+    if prev_mask is not None:
+        yield prev_window, smooth([prev_mask], prev_mask.shape[0])
+
+_END = object()
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy_s = 0.0
+        self.wait_in_s = 0.0
+        self.wait_out_s = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'items': self.items,
+            'busy_s': round(self.busy_s, 4),
+            'wait_in_s': round(self.wait_in_s, 4),
+            'wait_out_s': round(self.wait_out_s, 4),
+        }
+
+class BoundedQueue:
+    def __init__(self, maxsize: int, abort: threading.Event):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._abort = abort
+        self.max_depth = 0
+        self._depth_sum = 0
+        self._samples = 0
+
+    def put(self, item) -> float:
+        start = time.perf_counter()
+        while not self._abort.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._sample()
+        return time.perf_counter() - start
+
+    def get(self):
+        start = time.perf_counter()
+        while not self._abort.is_set():
+            try:
+                item = self._queue.get(timeout=0.1)
+                self._sample()
+                return item, time.perf_counter() - start
+            except queue.Empty:
+                continue
+        return _END, time.perf_counter() - start
+
+    def _sample(self):
+        depth = self._queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_sum += depth
+        self._samples += 1
+
+    def as_dict(self) -> dict:
+        return {
+            'max_depth': self.max_depth,
+            'mean_depth': round(self._depth_sum / self._samples, 3) if self._samples else 0.0,
+        }
+
+class PipelinedExecutor:
+    # read -> [queue] -> infer -> [queue] -> write. The reader and writer run
+    # on their own threads; inference stays on the calling thread. A bounded
+    # queue between stages caps how many windows are held in memory at once.
+    def __init__(self, read_fn, infer_fn, write_fn, queue_depth: int = PIPELINE_QUEUE_DEPTH):
+        if queue_depth < 1:
+            raise ValueError(f"Queue depth harus >= 1: {queue_depth}")
+        self.read_fn = read_fn
+        self.infer_fn = infer_fn
+        self.write_fn = write_fn
+        self.queue_depth = queue_depth
+        self.stats = {}
+
+    def run(self, items) -> dict:
+        abort = threading.Event()
+        errors = []
+        read_q = BoundedQueue(self.queue_depth, abort)
+        write_q = BoundedQueue(self.queue_depth, abort)
+        reader = StageStats('read')
+        infer = StageStats('infer')
+        writer = StageStats('write')
+
+        def fail(exc):
+            errors.append(exc)
+            abort.set()
+
+        def read_loop():
+            try:
+                for item in items:
+                    if abort.is_set():
+                        return
+                    start = time.perf_counter()
+                    data = self.read_fn(item)
+                    reader.busy_s += time.perf_counter() - start
+                    reader.items += 1
+                    reader.wait_out_s += read_q.put((item, data))
+            except Exception as e:
+                fail(e)
+            finally:
+                read_q.put(_END)
+
+        def drain(q, stats):
+            while True:
+                entry, waited = q.get()
+                stats.wait_in_s += waited
+                if entry is _END:
+                    return
+                yield entry
+
+        def write_loop():
+            start = time.perf_counter()
+            try:
+                for _ in self.write_fn(drain(write_q, writer)):
+                    writer.items += 1
+            except Exception as e:
+                fail(e)
+            finally:
+                writer.busy_s = time.perf_counter() - start - writer.wait_in_s
+
+        started = time.perf_counter()
+        read_thread = threading.Thread(target=read_loop, name="pipeline-read", daemon=True)
+        write_thread = threading.Thread(target=write_loop, name="pipeline-write", daemon=True)
+        read_thread.start()
+        write_thread.start()
+
+        try:
+            for item, data in drain(read_q, infer):
+                start = time.perf_counter()
+                result = self.infer_fn(data)
+                infer.busy_s += time.perf_counter() - start
+                infer.items += 1
+                infer.wait_out_s += write_q.put((item, result))
+        except Exception as e:
+            fail(e)
+        finally:
+            write_q.put(_END)
+            read_thread.join()
+            write_thread.join()
+
+        if errors:
+            raise errors[0]
+
+        self.stats = {
+            'queue_depth': self.queue_depth,
+            'elapsed_s': round(time.perf_counter() - started, 4),
+            'stages': {s.name: s.as_dict() for s in (reader, infer, writer)},
+            'queues': {'read': read_q.as_dict(), 'write': write_q.as_dict()},
+        }
+        return self.stats
+
+def run_streaming_detection(detector, input_path: str, output_path: str, tile_size: int = DEFAULT_TILE_SIZE,
+                            window_pixels: int = STREAM_WINDOW_PIXELS, water_class: int = 1, writer_options: dict = None,
+                            queue_depth: int = PIPELINE_QUEUE_DEPTH):
+    with rasterio.open(input_path) as src:
+        transform = src.transform
+        crs = src.crs
+        windows = list(iter_stream_windows(src, tile_size, window_pixels))
+        stats = detector.stream_stats(src, windows)
+
+        def read(window):
+            with trace_stage("preprocess"):
+                return detector.preprocess_window(src, window, stats)
+
+        def infer(image):
+            with trace_stage("inference"):
+                return detector.detect_window(image, tile_size)
+
+        def postprocess_mask(mask):
+            with trace_stage("postprocess_mask"):
+                return detector.postprocess_mask(mask)
+
+        # Each strip is polygonized as it is written and the pieces are
+        # stitched at the seams afterwards, so no whole-scene mask is kept.
+        strip_polygons, strip_offsets = [], []
+
+        with MaskWriter(output_path, src.profile, **(writer_options or {})) as writer:
+            def write(strips):
+                for window, mask in iter_smoothed_strips(strips, detector.stream_halo, postprocess_mask):
+                    with trace_stage("save_tiff"):
+                        writer.write_window(mask, window)
+                    with trace_stage("mask_to_polygons"):
+                        strip_polygons.append(polygonize_strip(mask, int(window.row_off)))
+                    strip_offsets.append(int(window.row_off))
+                    yield window, mask
+
+            executor = PipelinedExecutor(read, infer, write, queue_depth=queue_depth)
+            pipeline_stats = executor.run(windows)
+
+        input_shape = (src.height, src.width, src.count)
+        profile = src.profile
+
+    logger.info(f"Streaming detection wrote {len(windows)} windows to {output_path}")
+
+    if detector.coastline_method != "polygons":
+        # Contour tracing needs the whole mask; strips only support polygons.
+        logger.info(f"Metode garis pantai {detector.coastline_method} tidak tersedia saat streaming, memakai polygons")
+    with trace_stage("mask_to_polygons"):
+        polygons_gdf = polygons_to_gdf(merge_strip_polygons(strip_polygons, strip_offsets), transform, crs)
+    del strip_polygons
+    result = detector.vectorize_polygons(polygons_gdf, transform, crs, water_class)
+    result.profile = profile
+    result.tiff_path = output_path
+
+    meta = {
+        'method': 'streaming_segmentation',
+        'coastline_method': 'polygons',
+        'tile_size': tile_size,
+        'batch_size': detector.batch_size,
+        'backend': detector.backend,
+        'precision': detector.precision,
+        'workers': detector.workers,
+        'input_shape': input_shape,
+        'window_count': len(windows),
+        'window_shape': (int(windows[0].height), int(windows[0].width)) if windows else None,
+        'pipeline': pipeline_stats,
+    }
+    return result, meta
+
+def run_detection(detector, input_path: str, file_handler, streaming: bool = False, water_class: int = 1,
+                  tracer: StageTracer = None) -> DetectionResult:
+    os.makedirs(file_handler.output_dir, exist_ok=True)
+    file_handler.current_file_path = input_path
+
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_stem = f"{base_name}_deteksi_{timestamp}"
+    output_filename = f"{output_stem}.tif"
+
+    model_registry.wait_until_warm(detector.model)
+
+    tracer = tracer or StageTracer()
+    with activate(tracer):
+        if streaming:
+            result, meta = run_streaming_detection(
+                detector, input_path, str(file_handler.output_dir / output_filename), water_class=water_class
+            )
+        elif detector.model_name in ("UAV_CoastlineDetector", "Sentinel2_CoastlineDetector"):
+            with trace_stage("preprocess"):
+                preprocessed, profile, transform, crs = detector.preprocess(input_path)[:4]
+            with trace_stage("inference"):
+                mask, meta = detector.detect(preprocessed)
+            del preprocessed
+            result = detector.postprocess(mask, transform, crs, water_class=water_class)
+            result.profile = profile
+            with trace_stage("save_tiff"):
+                result.tiff_path = file_handler.save_tiff(result.mask, result.profile, filename=output_filename)
+        else:
+            raise ValueError("Model tidak dikenali")
+
+        if BUILD_MASK_OVERVIEWS and result.tiff_path:
+            overview_builder.submit(result.tiff_path, OVERVIEW_MASK_RESAMPLING)
+
+        if result.has_coastline:
+            with trace_stage("save_shapefile"):
+                result.shapefile_path = file_handler.save_coastline_shapefile(
+                    result.coastline, filename=f"{output_stem}_coastline.shp"
+                )
+        elif result.has_polygons:
+            logger.warning("No coastline extracted from polygons.")
+        else:
+            logger.warning("Polygons kosong")
+
+    trace = tracer.as_dict()
+    logger.info(f"Detection trace for {input_path}:\n{tracer.format()}")
+
+    meta.update(result.meta)
+    meta.update({
+        'tiff_path': result.tiff_path,
+        'shapefile_path': result.shapefile_path,
+        'polygons_available': result.has_polygons,
+        'coastline_available': result.has_coastline,
+        'model_cache': model_registry.stats(),
+        'trace': trace,
+        'report_path': None,
+    })
+
+    if WRITE_RUN_REPORT:
+        report_path = file_handler.output_dir / f"{output_stem}_report.json"
+        meta['report_path'] = write_run_report(report_path, {
+            'input': input_path,
+            'model': detector.model_name,
+            'created': datetime.now().isoformat(timespec="seconds"),
+            'meta': meta,
+        })
+    result.meta = meta
+    return result
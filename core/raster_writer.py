@@ -0,0 +1,92 @@
+from pathlib import Path
+import numpy as np
+import rasterio
+import rasterio.shutil
+import logging
+
+from config.settings import (
+    MASK_COMPRESSION, MASK_PREDICTOR, MASK_BLOCK_SIZE, MASK_WRITE_COG, GDAL_NUM_THREADS
+)
+
+logger = logging.getLogger(__name__)
+
+# Source profile keys that describe the input layout rather than the mask.
+_DROPPED_PROFILE_KEYS = ("photometric", "interleave", "blockxsize", "blockysize", "tiled", "compress", "predictor")
+
+class MaskWriter:
+    def __init__(self, path, profile: dict, compress: str = MASK_COMPRESSION, predictor: int = MASK_PREDICTOR,
+                 blocksize: int = MASK_BLOCK_SIZE, cog: bool = MASK_WRITE_COG, num_threads: str = GDAL_NUM_THREADS):
+        self.path = Path(path)
+        self.compress = compress
+        self.predictor = predictor
+        self.blocksize = blocksize
+        self.cog = cog
+        self.num_threads = num_threads
+
+        self.profile = {k: v for k, v in profile.items() if k not in _DROPPED_PROFILE_KEYS}
+        self.profile.update({
+            "driver": "GTiff",
+            "count": 1,
+            "dtype": "uint8",
+            "tiled": True,
+            "blockxsize": blocksize,
+            "blockysize": blocksize,
+            "compress": compress,
+            "num_threads": num_threads,
+        })
+        if predictor:
+            self.profile["predictor"] = predictor
+
+        # A COG is finished by copying a regular tiled GeoTIFF through the
+        # COG driver, so windows are first written to a scratch file.
+        self._target = self.path.with_name(f"{self.path.stem}.partial{self.path.suffix}") if cog else self.path
+        self._dst = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def open(self) -> "MaskWriter":
+        self._dst = rasterio.open(self._target, "w", **self.profile)
+        return self
+
+    def write_window(self, data: np.ndarray, window) -> None:
+        self._dst.write(np.asarray(data, dtype=np.uint8), 1, window=window)
+
+    def write(self, data: np.ndarray) -> None:
+        self._dst.write(np.asarray(data, dtype=np.uint8), 1)
+
+    def close(self) -> str:
+        if self._dst is not None:
+            self._dst.close()
+            self._dst = None
+        if self.cog:
+            self._finish_cog()
+        return str(self.path)
+
+    def abort(self) -> None:
+        if self._dst is not None:
+            self._dst.close()
+            self._dst = None
+        self._target.unlink(missing_ok=True)
+
+    def _finish_cog(self) -> None:
+        options = {
+            "compress": self.compress,
+            "blocksize": self.blocksize,
+            "overview_resampling": "nearest",
+            "num_threads": self.num_threads,
+        }
+        if self.predictor:
+            options["predictor"] = "YES"
+        try:
+            rasterio.shutil.copy(str(self._target), str(self.path), driver="COG", **options)
+        finally:
+            self._target.unlink(missing_ok=True)
+        logger.info(f"COG written to: {self.path}")
@@ -0,0 +1,121 @@
+import sys
+import time
+import importlib
+import importlib.abc
+import logging
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+class _TimingLoader(importlib.abc.Loader):
+    def __init__(self, loader, profiler: "StartupProfiler", name: str):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, item):
+        return getattr(self._loader, item)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self._profiler.timed_import(self._name):
+            self._loader.exec_module(module)
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    def __init__(self, profiler: "StartupProfiler"):
+        self._profiler = profiler
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimingLoader(spec.loader, self._profiler, name)
+                return spec
+        return None
+
+class StartupProfiler:
+    # Records wall time of named startup sections and, while the import hook
+    # is installed, the inclusive and self time of every module import.
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.sections = []
+        self.imports = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._finder = None
+
+    def install_import_hook(self) -> None:
+        if self.enabled and self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def remove_import_hook(self) -> None:
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    @contextmanager
+    def section(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.sections.append((name, elapsed, threading.current_thread().name))
+
+    @contextmanager
+    def timed_import(self, name: str):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            inclusive = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += inclusive
+            with self._lock:
+                self.imports[name] = (inclusive, inclusive - children)
+
+    def mark_ready(self) -> None:
+        with self._lock:
+            self.sections.append(("ready", time.perf_counter() - self.started, threading.current_thread().name))
+
+    def report(self, top: int = 25) -> str:
+        lines = ["Startup profile", "-" * 64]
+        for name, elapsed, thread in self.sections:
+            lines.append(f"{elapsed * 1000:10.1f} ms  {name}  [{thread}]")
+        if self.imports:
+            lines.append("")
+            lines.append(f"Top {top} imports by self time (self / inclusive)")
+            lines.append("-" * 64)
+            ranked = sorted(self.imports.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+            for name, (inclusive, own) in ranked:
+                lines.append(f"{own * 1000:10.1f} / {inclusive * 1000:10.1f} ms  {name}")
+        return "\n".join(lines)
+
+def preload_modules(modules: List[str], profiler: Optional[StartupProfiler] = None) -> List[str]:
+    failed = []
+    for name in modules:
+        try:
+            if profiler is not None:
+                with profiler.section(f"preload {name}"):
+                    importlib.import_module(name)
+            else:
+                importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"Preload of {name} failed: {str(e)}")
+            failed.append(name)
+    return failed
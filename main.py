@@ -1,14 +1,15 @@
 import sys
 import os, logging
+import multiprocessing
 from PyQt5.QtWidgets import QApplication,  QSplashScreen
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QIcon, QPixmap
 from utils.helper import resource_path
+from core.startup import StartupProfiler, preload_modules
+from config.settings import STARTUP_PRELOAD_MODULES
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from ui.main_window import MainWindow
-
 logging.basicConfig(
     filename='app_debug.log',
     level=logging.DEBUG,
@@ -36,22 +37,33 @@ class SplashScreen(QSplashScreen):
         
         self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint)
         
-        self.showMessage('<font color="white" size="5"><b>Loading CoDec App...</b></font>', 
+        self.setStatus("Loading CoDec App...")
+
+    def setStatus(self, text):
+        self.showMessage(f'<font color="white" size="5"><b>{text}</b></font>', 
                         Qt.AlignBottom | Qt.AlignCenter)
-        
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.close_splash)
-        
-    def show_splash(self, duration=3000):
-        self.show()
-        self.timer.start(duration)
-        
-    def close_splash(self):
-        self.timer.stop()
-        self.close()
+        QApplication.processEvents()
+
+class ModulePreloader(QThread):
+    preloaded = pyqtSignal(list)
+
+    def __init__(self, modules, profiler):
+        super().__init__()
+        self.modules = modules
+        self.profiler = profiler
+
+    def run(self):
+        self.preloaded.emit(preload_modules(self.modules, self.profiler))
 
 def main():
-    app = QApplication(sys.argv)
+    profile_startup = '--profile-startup' in sys.argv
+    argv = [arg for arg in sys.argv if arg != '--profile-startup']
+
+    profiler = StartupProfiler(enabled=profile_startup)
+    profiler.install_import_hook()
+
+    with profiler.section("QApplication"):
+        app = QApplication(argv)
     
     app.setApplicationName("CoDec App")
     app.setApplicationVersion("1.0")
@@ -63,19 +75,40 @@ def main():
     app.setWindowIcon(QIcon(resource_path('assets/codec.png')))
     
     splash = SplashScreen()
-    splash.show_splash(3000)
-    
+    splash.show()
     app.processEvents()
-    
-    window = MainWindow()
-    
-    def show_main_window():
-        splash.close()
-        window.show()
-    
-    QTimer.singleShot(3000, show_main_window)
+
+    with profiler.section("import ui.main_window"):
+        from ui.main_window import MainWindow
+
+    splash.setStatus("Menyiapkan antarmuka...")
+    with profiler.section("MainWindow()"):
+        window = MainWindow()
+
+    # Heavy scientific modules (GeoPandas, OpenCV, TensorFlow) are imported
+    # in the background once the window is up; first use waits on the
+    # import lock if the user gets there before the preloader does.
+    preloader = ModulePreloader(STARTUP_PRELOAD_MODULES, profiler)
+
+    def on_preloaded(failed):
+        if failed:
+            logging.warning(f"Modules not preloaded: {failed}")
+        if profile_startup:
+            profiler.remove_import_hook()
+            report = profiler.report()
+            logging.info(report)
+            print(report)
+
+    preloader.preloaded.connect(on_preloaded)
+
+    window.show()
+    splash.finish(window)
+    profiler.mark_ready()
+    preloader.start()
     
     return app.exec_()
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    # Inference worker processes are spawned; frozen builds need this.
+    multiprocessing.freeze_support()
+    sys.exit(main())
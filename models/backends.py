@@ -0,0 +1,311 @@
+import os
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config.settings import INFERENCE_NUM_THREADS, DEFAULT_TILE_SIZE
+
+logger = logging.getLogger(__name__)
+
+class InferenceBackend(ABC):
+    name = "base"
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = INFERENCE_NUM_THREADS):
+        self.model_path = model_path
+        self.num_threads = num_threads
+
+    @property
+    @abstractmethod
+    def input_shape(self) -> tuple:
+        pass
+
+    @abstractmethod
+    def predict(self, batch: np.ndarray, verbose: int = 0) -> np.ndarray:
+        pass
+
+    def count_params(self) -> int:
+        # Used by the model registry for its memory budget; serialized model
+        # size is a close enough proxy for backends without a param count.
+        path = Path(self.model_path)
+        if path.is_dir():
+            return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) // 4
+        return path.stat().st_size // 4
+
+class KerasBackend(InferenceBackend):
+    name = "keras"
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = INFERENCE_NUM_THREADS):
+        super().__init__(model_path, num_threads)
+        from keras.models import load_model
+        self.model = load_model(model_path, compile=False)
+
+    @property
+    def input_shape(self) -> tuple:
+        return tuple(self.model.input_shape)
+
+    def predict(self, batch: np.ndarray, verbose: int = 0) -> np.ndarray:
+        return self.model.predict(batch, verbose=verbose)
+
+    def count_params(self) -> int:
+        return self.model.count_params()
+
+class SavedModelBackend(InferenceBackend):
+    name = "savedmodel"
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = INFERENCE_NUM_THREADS):
+        super().__init__(model_path, num_threads)
+        import tensorflow as tf
+        self._tf = tf
+        self.model = tf.saved_model.load(model_path)
+        self._fn = self.model.signatures["serving_default"]
+        spec = list(self._fn.structured_input_signature[1].values())[0]
+        self._input_shape = tuple(spec.shape.as_list())
+
+    @property
+    def input_shape(self) -> tuple:
+        return self._input_shape
+
+    def predict(self, batch: np.ndarray, verbose: int = 0) -> np.ndarray:
+        outputs = self._fn(self._tf.constant(batch, dtype=self._tf.float32))
+        return next(iter(outputs.values())).numpy()
+
+class TFLiteBackend(InferenceBackend):
+    name = "tflite"
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = INFERENCE_NUM_THREADS):
+        super().__init__(model_path, num_threads)
+        # tflite_runtime is a few MB; fall back to the interpreter bundled
+        # with full TensorFlow. Both apply the XNNPACK delegate by default
+        # to float models on CPU.
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_shape = tuple(self._input["shape"])
+
+    @property
+    def input_shape(self) -> tuple:
+        return (None, *self._input["shape"][1:])
+
+    def predict(self, batch: np.ndarray, verbose: int = 0) -> np.ndarray:
+        if tuple(batch.shape) != self._batch_shape:
+            self.interpreter.resize_tensor_input(self._input["index"], batch.shape)
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch_shape = tuple(batch.shape)
+
+        self.interpreter.set_tensor(self._input["index"], self._quantize(batch))
+        self.interpreter.invoke()
+        return self._dequantize(self.interpreter.get_tensor(self._output["index"]))
+
+    def _quantize(self, batch: np.ndarray) -> np.ndarray:
+        dtype = self._input["dtype"]
+        if dtype == np.float32:
+            return batch.astype(np.float32, copy=False)
+        scale, zero_point = self._input["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, output: np.ndarray) -> np.ndarray:
+        if output.dtype == np.float32:
+            return output
+        scale, zero_point = self._output["quantization"]
+        return (output.astype(np.float32) - zero_point) * scale
+
+class OnnxBackend(InferenceBackend):
+    name = "onnx"
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = INFERENCE_NUM_THREADS):
+        super().__init__(model_path, num_threads)
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input = self.session.get_inputs()[0]
+
+    @property
+    def input_shape(self) -> tuple:
+        return tuple(d if isinstance(d, int) else None for d in self._input.shape)
+
+    def predict(self, batch: np.ndarray, verbose: int = 0) -> np.ndarray:
+        return self.session.run(None, {self._input.name: batch.astype(np.float32, copy=False)})[0]
+
+BACKENDS = {
+    KerasBackend.name: KerasBackend,
+    SavedModelBackend.name: SavedModelBackend,
+    TFLiteBackend.name: TFLiteBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+_BACKEND_SUFFIXES = {
+    "keras": ".h5",
+    "savedmodel": "_savedmodel",
+    "tflite": ".tflite",
+    "onnx": ".onnx",
+}
+
+def load_backend(model_path: str, backend: str = "keras", num_threads: Optional[int] = INFERENCE_NUM_THREADS) -> InferenceBackend:
+    backend_cls = BACKENDS.get(backend)
+    if backend_cls is None:
+        raise ValueError(f"Backend inferensi tidak dikenali: {backend}. Pilihan: {', '.join(BACKENDS)}")
+    return backend_cls(model_path, num_threads=num_threads)
+
+PRECISIONS = ("float32", "float16", "int8")
+
+def model_path_for_backend(model_path: str, backend: str, precision: str = "float32") -> str:
+    # models/uav.h5 -> models/uav.tflite, models/uav.onnx, models/uav_savedmodel;
+    # reduced precision only exists as TFLite: models/uav_float16.tflite
+    if backend not in _BACKEND_SUFFIXES:
+        raise ValueError(f"Backend inferensi tidak dikenali: {backend}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Presisi tidak dikenali: {precision}. Pilihan: {', '.join(PRECISIONS)}")
+    base, _ = os.path.splitext(model_path)
+    if precision != "float32":
+        if backend != "tflite":
+            raise ValueError(f"Presisi {precision} hanya tersedia untuk backend tflite, bukan {backend}.")
+        return f"{base}_{precision}.tflite"
+    return base + _BACKEND_SUFFIXES[backend]
+
+def convert_to_savedmodel(keras_path: str, output_path: Optional[str] = None) -> str:
+    from keras.models import load_model
+    output_path = output_path or model_path_for_backend(keras_path, "savedmodel")
+    load_model(keras_path, compile=False).save(output_path, save_format="tf")
+    logger.info(f"SavedModel written to: {output_path}")
+    return output_path
+
+def convert_to_tflite(keras_path: str, output_path: Optional[str] = None, optimizations: Sequence = (),
+                      supported_types: Sequence = (), representative_dataset=None, integer_io: bool = False) -> str:
+    import tensorflow as tf
+    from keras.models import load_model
+
+    output_path = output_path or model_path_for_backend(keras_path, "tflite")
+    converter = tf.lite.TFLiteConverter.from_keras_model(load_model(keras_path, compile=False))
+    converter.optimizations = list(optimizations)
+    if supported_types:
+        converter.target_spec.supported_types = list(supported_types)
+    if representative_dataset is not None:
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        if integer_io:
+            converter.inference_input_type = tf.int8
+            converter.inference_output_type = tf.int8
+
+    Path(output_path).write_bytes(converter.convert())
+    logger.info(f"TFLite model written to: {output_path}")
+    return output_path
+
+def convert_to_onnx(keras_path: str, output_path: Optional[str] = None, opset: int = 13) -> str:
+    import tensorflow as tf
+    import tf2onnx
+    from keras.models import load_model
+
+    output_path = output_path or model_path_for_backend(keras_path, "onnx")
+    model = load_model(keras_path, compile=False)
+    spec = (tf.TensorSpec((None, *model.input_shape[1:]), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=output_path)
+    logger.info(f"ONNX model written to: {output_path}")
+    return output_path
+
+CONVERTERS = {
+    "savedmodel": convert_to_savedmodel,
+    "tflite": convert_to_tflite,
+    "onnx": convert_to_onnx,
+}
+
+def sample_tiles(image: np.ndarray, tile_size: int = DEFAULT_TILE_SIZE, count: int = 16, seed: int = 0) -> np.ndarray:
+    if image.ndim == 2:
+        image = image[:, :, np.newaxis]
+    h, w, c = image.shape
+    origins = [(r, col) for r in range(0, h - tile_size + 1, tile_size) for col in range(0, w - tile_size + 1, tile_size)]
+    if not origins:
+        raise ValueError(f"Citra ({h}x{w}) lebih kecil dari ukuran tile {tile_size}.")
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(origins), size=min(count, len(origins)), replace=False)
+    tiles = np.empty((len(picks), tile_size, tile_size, c), dtype=np.float32)
+    for i, pick in enumerate(picks):
+        r, col = origins[pick]
+        tiles[i] = image[r:r + tile_size, col:col + tile_size]
+    return tiles
+
+def mask_iou(reference: np.ndarray, candidate: np.ndarray, class_id: int = 1) -> float:
+    ref = reference == class_id
+    cand = candidate == class_id
+    union = np.logical_or(ref, cand).sum()
+    if union == 0:
+        return 1.0
+    return float(np.logical_and(ref, cand).sum() / union)
+
+def check_backend_parity(models: Dict[str, InferenceBackend], tiles: np.ndarray, reference: str = "keras",
+                         batch_size: int = 8, class_id: int = 1) -> Dict[str, dict]:
+    # Compares argmax masks of every backend against the reference backend
+    # on the same tiles.
+    def predict_all(model):
+        outputs = [model.predict(tiles[i:i + batch_size], verbose=0) for i in range(0, len(tiles), batch_size)]
+        return np.concatenate(outputs)
+
+    if reference not in models:
+        raise ValueError(f"Backend referensi '{reference}' tidak ada di daftar model.")
+    ref_probs = predict_all(models[reference])
+    ref_mask = np.argmax(ref_probs, axis=-1)
+
+    report = {}
+    for name, model in models.items():
+        probs = predict_all(model)
+        mask = np.argmax(probs, axis=-1)
+        report[name] = {
+            'pixel_agreement': float((mask == ref_mask).mean()),
+            'iou': mask_iou(ref_mask, mask, class_id),
+            'max_abs_prob_diff': float(np.abs(probs.astype(np.float32) - ref_probs.astype(np.float32)).max()),
+        }
+    return report
+
+def _main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Konversi model dan cek paritas antar backend inferensi.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    convert = sub.add_parser("convert", help="Konversi model Keras .h5 ke backend lain")
+    convert.add_argument("model", help="Path model Keras (.h5)")
+    convert.add_argument("--backend", choices=sorted(CONVERTERS), required=True)
+    convert.add_argument("--output")
+
+    parity = sub.add_parser("parity", help="Bandingkan mask antar backend pada tile contoh")
+    parity.add_argument("model", help="Path model Keras (.h5); path backend lain diturunkan dari nama ini")
+    parity.add_argument("image", help="GeoTIFF contoh")
+    parity.add_argument("--model-type", choices=["uav", "sentinel"], required=True)
+    parity.add_argument("--backends", nargs="+", default=sorted(BACKENDS))
+    parity.add_argument("--tiles", type=int, default=16)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        print(CONVERTERS[args.backend](args.model, args.output))
+        return 0
+
+    if args.model_type == "uav":
+        from utils.preprocess import preprocess_image_uav
+        image = preprocess_image_uav(args.image)[0]
+    else:
+        from utils.preprocess import preprocess_sentinel2
+        image = preprocess_sentinel2(args.image)[0][0]
+
+    tiles = sample_tiles(image, count=args.tiles)
+    models = {name: load_backend(model_path_for_backend(args.model, name), name) for name in args.backends}
+    print(json.dumps(check_backend_parity(models, tiles, reference=args.backends[0]), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -1,18 +1,27 @@
-import os
 import numpy as np
-import rasterio
+import shapely
 from abc import ABC, abstractmethod
 from typing import Optional, Tuple, Dict, Any
-from keras.models import load_model
-from PyQt5.QtCore import QThread, pyqtSignal
-from datetime import datetime
 
 import logging
 
-from utils.preprocess import preprocess_image_uav, preprocess_sentinel2
-from utils.postprocess import  morphological_smooth, mask_to_polygons, extract_coastline
-from core.file_handler import FileHandler
+from utils.preprocess import (
+    preprocess_image_uav, preprocess_sentinel2,
+    compute_uav_channel_stats, preprocess_uav_window, preprocess_sentinel2_window
+)
+from utils.postprocess import  (
+    morphological_smooth, mask_to_polygons, extract_coastline, contour_coastline, simplify_coastline
+)
 from utils.helper import resource_path, run_patch_prediction
+from utils.spectral import required_bands
+from utils.tracing import trace_stage, trace_count
+from models.registry import model_registry
+from models.detection_result import DetectionResult
+from models.backends import model_path_for_backend
+from config.settings import (
+    DEFAULT_BATCH_SIZE, DEFAULT_TILE_SIZE, DETECTOR_BACKENDS, DETECTOR_PRECISIONS, INFERENCE_WORKERS,
+    COASTLINE_METHOD, COASTLINE_MERGE_LINES, COASTLINE_SIMPLIFY_PIXELS, POLYGONIZE_WORKERS, SENTINEL2_INDICES
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +30,46 @@ class BaseCoastlineDetector(ABC):
         self.model_name = "BaseDetector"
         self.is_loaded = False
         self.parameters = {}
+        self.model_path = None
+        self.backend = "keras"
+        self.precision = "float32"
+        self.workers = INFERENCE_WORKERS
+        self.coastline_method = COASTLINE_METHOD
+        self.merge_lines = COASTLINE_MERGE_LINES
+        self.simplify_pixels = COASTLINE_SIMPLIFY_PIXELS
+        self.polygonize_workers = POLYGONIZE_WORKERS
+        self._tile_predictor = None
+
+    def _inference_model_path(self) -> str:
+        return resource_path(model_path_for_backend(self.model_path, self.backend, self.precision))
+
+    def _load_inference_model(self):
+        return model_registry.get(self._inference_model_path(), backend=self.backend)
+
+    def _predict_mask(self, image: np.ndarray, tile_size: int, is_multichannel: bool) -> np.ndarray:
+        h, w = image.shape[:2]
+        trace_count("tiles", -(-h // tile_size) * -(-w // tile_size))
+        if self.workers <= 1:
+            return run_patch_prediction(
+                model=self.model,
+                image=image,
+                tile_size=tile_size,
+                channels_last=True,
+                is_multichannel=is_multichannel,
+                batch_size=self.batch_size
+            )
+
+        if self._tile_predictor is None:
+            from utils.parallel_inference import ParallelTilePredictor
+            self._tile_predictor = ParallelTilePredictor(
+                self._inference_model_path(), backend=self.backend, workers=self.workers, batch_size=self.batch_size
+            )
+        return self._tile_predictor.predict(image, tile_size=tile_size, channels_last=True, is_multichannel=is_multichannel)
+
+    def close(self) -> None:
+        if self._tile_predictor is not None:
+            self._tile_predictor.close()
+            self._tile_predictor = None
     
     @abstractmethod
     def load_model(self) -> bool:
@@ -38,8 +87,68 @@ class BaseCoastlineDetector(ABC):
     def postprocess(self, transform, crs, detection_result: np.ndarray) -> np.ndarray:
         pass
 
+    # Streaming hooks: rows of context postprocess_mask needs on each side
+    # of a strip so windowed results match the whole-scene mask.
+    stream_halo = 0
+
+    def stream_stats(self, src, windows) -> dict:
+        return {}
+
+    @abstractmethod
+    def preprocess_window(self, src, window, stats: dict) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def detect_window(self, image: np.ndarray, tile_size: int = DEFAULT_TILE_SIZE) -> np.ndarray:
+        pass
+
+    def postprocess_mask(self, mask: np.ndarray) -> np.ndarray:
+        return mask
+
+    def vectorize(self, mask: np.ndarray, transform, crs, water_class: int = 1) -> DetectionResult:
+        if self.coastline_method == "contours":
+            with trace_stage("extract_coastline"):
+                coastline_gdf = contour_coastline(mask, transform, crs, water_class)
+            trace_count("coastline_vertices", shapely.get_num_coordinates(coastline_gdf.geometry.values).sum())
+            return self._finish_coastline(DetectionResult(mask, None, coastline_gdf, transform, crs, water_class=water_class))
+        if self.coastline_method != "polygons":
+            raise ValueError(f"Metode garis pantai tidak dikenali: {self.coastline_method}. Pilihan: polygons, contours")
+
+        with trace_stage("mask_to_polygons"):
+            polygons_gdf = mask_to_polygons(mask, transform, crs, workers=self.polygonize_workers)
+        return self.vectorize_polygons(polygons_gdf, transform, crs, water_class, mask)
+
+    def vectorize_polygons(self, polygons_gdf, transform, crs, water_class: int = 1,
+                           mask: Optional[np.ndarray] = None) -> DetectionResult:
+        # The polygon route from already built water polygons; streaming
+        # builds them strip by strip and has no whole mask to pass.
+        coastline_gdf = None
+
+        if polygons_gdf is not None and not polygons_gdf.empty:
+            trace_count("polygons", len(polygons_gdf))
+            trace_count("polygon_vertices", shapely.get_num_coordinates(polygons_gdf.geometry.values).sum())
+            with trace_stage("extract_coastline"):
+                coastline_gdf = extract_coastline(polygons_gdf, water_class)
+            if coastline_gdf is not None and not coastline_gdf.empty:
+                trace_count("coastline_vertices", shapely.get_num_coordinates(coastline_gdf.geometry.values).sum())
+        else:
+            logger.warning("Polygons Kosong")
+
+        return self._finish_coastline(DetectionResult(mask, polygons_gdf, coastline_gdf, transform, crs, water_class=water_class))
+
+    def _finish_coastline(self, result: DetectionResult) -> DetectionResult:
+        if not result.has_coastline or not (self.merge_lines or self.simplify_pixels):
+            return result
+        with trace_stage("simplify_coastline"):
+            result.coastline, stats = simplify_coastline(
+                result.coastline, result.transform, self.simplify_pixels, self.merge_lines
+            )
+        result.meta['coastline_simplification'] = stats
+        return result
+
 class UAVCoastlineDetector(BaseCoastlineDetector):
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE, backend: str = "keras",
+                 precision: str = "float32", workers: int = INFERENCE_WORKERS):
         super().__init__()
         self.model_name = "UAV_CoastlineDetector"
         self.parameters = {
@@ -48,15 +157,18 @@ class UAVCoastlineDetector(BaseCoastlineDetector):
             'gaussian_blur': (5, 5)
         }
         self.model_path = model_path or "models/uav.h5"
+        self.backend = backend
+        self.precision = precision
+        self.batch_size = batch_size
+        self.workers = workers
         self.model = None
         self.metadata = {}
 
     def load_model(self) -> bool:
         try:
-            full_path = resource_path(self.model_path)
-            self.model = load_model(full_path, compile=False)
+            self.model = self._load_inference_model()
             self.is_loaded = True
-            logger.info("UAV model loaded successfully")
+            logger.info(f"UAV model loaded successfully [{self.backend}, {self.precision}]")
             return True
         except Exception as e:
             logger.error(f"Error loading UAV model: {str(e)}")
@@ -71,18 +183,16 @@ class UAVCoastlineDetector(BaseCoastlineDetector):
             logger.error(f"UAV preprocessing error: {str(e)}")
             raise
 
-    def detect(self, rgb_image: np.ndarray, tile_size: int = 256) -> Tuple[np.ndarray, Dict[str, Any]]:
+    def detect(self, rgb_image: np.ndarray, tile_size: int = DEFAULT_TILE_SIZE) -> Tuple[np.ndarray, Dict[str, Any]]:
         try:
-            mask = run_patch_prediction(
-                model=self.model,
-                image=rgb_image,
-                tile_size=256,
-                channels_last=True,
-                is_multichannel=True
-            )
+            mask = self._predict_mask(rgb_image, tile_size, is_multichannel=True)
             self.metadata = {
                 'method': 'uav_model_segmentation',
                 'tile_size': tile_size,
+                'batch_size': self.batch_size,
+                'backend': self.backend,
+                'precision': self.precision,
+                'workers': self.workers,
                 'input_shape': rgb_image.shape,
             }
             return mask, self.metadata
@@ -91,177 +201,130 @@ class UAVCoastlineDetector(BaseCoastlineDetector):
             logger.exception(f"UAV detection error: {str(e)}")
             return np.zeros(rgb_image.shape[:2], dtype=np.uint8), {}
 
-    def postprocess(self, detection_result: np.ndarray, transform, crs, water_class: int = 1) -> dict:
+    # Opening then closing with a 7x7 kernel reaches 2 * 2 * 3 rows away.
+    stream_halo = 12
+
+    def stream_stats(self, src, windows) -> dict:
+        return compute_uav_channel_stats(src, windows)
+
+    def preprocess_window(self, src, window, stats: dict) -> np.ndarray:
+        return preprocess_uav_window(src, window, stats)
+
+    def detect_window(self, rgb_image: np.ndarray, tile_size: int = DEFAULT_TILE_SIZE) -> np.ndarray:
+        return self._predict_mask(rgb_image, tile_size, is_multichannel=True)
+
+    def postprocess_mask(self, mask: np.ndarray) -> np.ndarray:
+        return morphological_smooth(mask, kernel_size=7, iterations=1)
+
+    def postprocess(self, detection_result: np.ndarray, transform, crs, water_class: int = 1) -> DetectionResult:
         try:
-            smoothed_mask = morphological_smooth(detection_result, kernel_size=7, iterations=1)
-            
-            polygons_gdf = mask_to_polygons(smoothed_mask, transform, crs)
-            
-            coastline_gdf = None
-            
-            if polygons_gdf is not None and not polygons_gdf.empty:
-                coastline_gdf = extract_coastline(polygons_gdf, water_class)
-            else:
-                logger.warning("Polygons Kosong")
-                
+            with trace_stage("postprocess_mask"):
+                smoothed = self.postprocess_mask(detection_result)
+            result = self.vectorize(smoothed, transform, crs, water_class)
             logger.info("Proses UAV Selesai")
-            
-            return {
-                'mask': smoothed_mask,
-                'polygons': polygons_gdf,
-                'coastline': coastline_gdf
-            }
+            return result
         
         except Exception as e:
             logger.error(f"Proses UAV Error: {str(e)}")
-            return{
-                'mask': detection_result,
-                'polygons': None,
-                'coastline': None
-            }
+            return DetectionResult(detection_result, transform=transform, crs=crs, water_class=water_class)
 
 class SentinelCoastlineDetector(BaseCoastlineDetector):
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, batch_size: int = DEFAULT_BATCH_SIZE, backend: str = "keras",
+                 precision: str = "float32", workers: int = INFERENCE_WORKERS):
         super().__init__()
         self.model_name = "Sentinel2_CoastlineDetector"
         self.model_path = model_path or "models/sentinel.h5"
+        self.backend = backend
+        self.precision = precision
+        self.batch_size = batch_size
+        self.workers = workers
         self.model = None
         self.ndwi_threshold = 0.5
+        self.indices = list(SENTINEL2_INDICES)
         self.parameters = {
             'water_index_threshold': self.ndwi_threshold,
-            'bands': ['B3', 'B8', 'B11'],
+            'indices': self.indices,
+            'bands': required_bands(self.indices),
             'resolution': 10
         }
         self.metadata = {}
 
     def load_model(self) -> bool:
         try:
-            full_path = resource_path(self.model_path)
-            self.model = load_model(full_path, compile=False)
+            self.model = self._load_inference_model()
             self.is_loaded = True
-            logger.info("Sentinel-2 coastline detection model loaded successfully")
+            logger.info(f"Sentinel-2 coastline detection model loaded successfully [{self.backend}, {self.precision}]")
             return True
         except Exception as e:
             logger.error(f"Error loading Sentinel-2 model: {str(e)}")
             return False
 
-    def preprocess(self, image_path: str) -> Tuple[np.ndarray, dict]:
+    def preprocess(self, image_path: str, return_bands: bool = False) -> Tuple[np.ndarray, dict]:
         try:
-            ndwi_stack, profile, transform, crs, bands = preprocess_sentinel2(image_path, ndwi_threshold=self.ndwi_threshold)
+            ndwi_stack, profile, transform, crs, bands = preprocess_sentinel2(
+                image_path, ndwi_threshold=self.ndwi_threshold, return_bands=return_bands, indices=self.indices
+            )
             logger.info("Preprocess sentinel-2 berhasil")
             return ndwi_stack, profile, transform, crs, bands
         except Exception as e:
             logger.error(f"UAV preprocessing error: {str(e)}")
             raise
 
-    def detect(self, ndwi_stack: np.ndarray, tile_size: int = 256) -> Tuple[np.ndarray, dict]:
+    def detect(self, ndwi_stack: np.ndarray, tile_size: int = DEFAULT_TILE_SIZE) -> Tuple[np.ndarray, dict]:
         try:
-            ndwi = ndwi_stack[0]
-            mask = run_patch_prediction(
-                model=self.model,
-                image=ndwi,
-                tile_size=256,
-                channels_last=True,
-                is_multichannel=False
-            )
-            self.metadata = {'method': 'sentinel_segmentation', 'tile_size': tile_size}
+            mask = self._predict_indices(ndwi_stack, tile_size)
+            self.metadata = {
+                'method': 'sentinel_segmentation',
+                'tile_size': tile_size,
+                'batch_size': self.batch_size,
+                'backend': self.backend,
+                'precision': self.precision,
+                'workers': self.workers
+            }
             return mask, self.metadata
         
         except Exception as e:
             logger.error(f"Sentinel detection error: {e}")
             return np.zeros(ndwi_stack.shape[1:3], dtype=np.uint8), {}
+
+    def preprocess_window(self, src, window, stats: dict) -> np.ndarray:
+        return preprocess_sentinel2_window(src, window, ndwi_threshold=self.ndwi_threshold, indices=self.indices)
+
+    def detect_window(self, ndwi_stack: np.ndarray, tile_size: int = DEFAULT_TILE_SIZE) -> np.ndarray:
+        return self._predict_indices(ndwi_stack, tile_size)
+
+    def _predict_indices(self, index_stack: np.ndarray, tile_size: int) -> np.ndarray:
+        # One index is the single-channel input of the NDWI model; several
+        # become the channels of a multichannel model, in self.indices order.
+        if len(index_stack) == 1:
+            return self._predict_mask(index_stack[0], tile_size, is_multichannel=False)
+        return self._predict_mask(np.moveaxis(index_stack, 0, -1), tile_size, is_multichannel=True)
+
+    def postprocess_mask(self, mask: np.ndarray) -> np.ndarray:
+        return (mask > 0.5).astype(np.uint8)
     
-    def postprocess(self, detection_result: np.ndarray, transform, crs, water_class: int = 1) -> dict:
+    def postprocess(self, detection_result: np.ndarray, transform, crs, water_class: int = 1) -> DetectionResult:
         try:
-            binary_mask = (detection_result > 0.5).astype(np.uint8)
-            
-            polygons_gdf = mask_to_polygons(binary_mask, transform, crs)
-            coastline_gdf = None
-            
-            if polygons_gdf is not None and not polygons_gdf.empty:
-                coastline_gdf = extract_coastline(polygons_gdf, water_class)
-            else:
-                logger.warning("Polygons Kosong")
-                
+            with trace_stage("postprocess_mask"):
+                smoothed = self.postprocess_mask(detection_result)
+            result = self.vectorize(smoothed, transform, crs, water_class)
             logger.info("Proses Satelit Selesai")
-            
-            return {
-                'mask': binary_mask,
-                'polygons': polygons_gdf,
-                'coastline': coastline_gdf
-            }
+            return result
             
         except Exception as e:
             logger.error(f"Proses Sentinel Error: {str(e)}")
-            return{
-                'mask': detection_result,
-                'polygons': None,
-                'coastline': None
-            }
+            return DetectionResult(detection_result, transform=transform, crs=crs, water_class=water_class)
 
 class CoastlineDetectorFactory:
     @staticmethod
-    def create_detector(model_type: str) -> Optional[BaseCoastlineDetector]:
+    def create_detector(model_type: str, batch_size: int = DEFAULT_BATCH_SIZE, backend: Optional[str] = None,
+                        precision: Optional[str] = None, workers: int = INFERENCE_WORKERS) -> Optional[BaseCoastlineDetector]:
+        backend = backend or DETECTOR_BACKENDS.get(model_type, "keras")
+        precision = precision or DETECTOR_PRECISIONS.get(model_type, "float32")
         if model_type == "✈️ UAV":
-            return UAVCoastlineDetector(model_path="models/uav.h5")
+            return UAVCoastlineDetector(model_path="models/uav.h5", batch_size=batch_size, backend=backend, precision=precision, workers=workers)
         elif model_type == "🛰️ Sentinel-2":
-            return SentinelCoastlineDetector(model_path="models/sentinel.h5")
+            return SentinelCoastlineDetector(model_path="models/sentinel.h5", batch_size=batch_size, backend=backend, precision=precision, workers=workers)
         else:
             logger.error(f"Unknown model type: {model_type}")
             return None
-
-class DetectionThread(QThread):
-    detectionFinished = pyqtSignal(str, dict)
-    detectionFailed = pyqtSignal(str)
-
-    def __init__(self, detector, input_image_path, input_image_array):
-        super().__init__()
-        self.detector = detector
-        self.input_image_path = input_image_path
-        self.input_image_array = input_image_array
-        self.file_handler = FileHandler()
-
-    def run(self):
-        try:
-            os.makedirs(self.file_handler.output_dir, exist_ok=True)
-
-            base_name = os.path.basename(self.input_image_path).replace('.tif', '')
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_filename = f"{base_name}_deteksi_{timestamp}.tif"
-
-            if self.detector.model_name == "UAV_CoastlineDetector":
-                preprocessed, profile, transform, crs = self.detector.preprocess(self.input_image_path)
-                mask, meta = self.detector.detect(preprocessed)
-                postprocess_result = self.detector.postprocess(mask, transform, crs, water_class=1)
-            elif self.detector.model_name == "Sentinel2_CoastlineDetector":
-                preprocessed, profile, transform, crs, bands = self.detector.preprocess(self.input_image_path)
-                mask, meta = self.detector.detect(preprocessed)
-                postprocess_result = self.detector.postprocess(mask, transform, crs, water_class=1)
-            else:
-                self.detectionFailed.emit("Model tidak dikenali")
-                return
-            
-            result_mask = postprocess_result['mask']
-            polygons_gdf = postprocess_result['polygons']
-            coastline_gdf = postprocess_result['coastline']
-            
-            tiff_path = self.file_handler.save_tiff(result_mask, profile, filename=output_filename)
-            shp_path = None
-            
-            if polygons_gdf is not None and not polygons_gdf.empty:
-                shp_path = self.file_handler.save_coastline_shapefile(polygons_gdf, water_class=1)
-            else:
-                logger.warning("Polygons kosong")
-                
-            meta.update({
-                'tiff_path': tiff_path,
-                'shapefile_path': shp_path,
-                'polygons_available': polygons_gdf is not None and not polygons_gdf.empty,
-                'coastline_available': coastline_gdf is not None and not coastline_gdf.empty
-            })
-            
-            self.detectionFinished.emit(tiff_path or "", meta)
-
-        except Exception as e:
-            logger.error(f"Error during detection: {str(e)}")
-            self.detectionFailed.emit(str(e))
\ No newline at end of file
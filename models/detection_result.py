@@ -0,0 +1,31 @@
+from typing import Any, Dict, Optional, TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+class DetectionResult:
+    # Everything one detection produces, computed once in postprocess and
+    # handed as-is to the writers and the previews. run_detection fills in
+    # the output paths and metadata.
+    def __init__(self, mask: np.ndarray, polygons: Optional["gpd.GeoDataFrame"] = None,
+                 coastline: Optional["gpd.GeoDataFrame"] = None, transform=None, crs=None,
+                 profile: Optional[dict] = None, water_class: int = 1):
+        self.mask = mask
+        self.polygons = polygons
+        self.coastline = coastline
+        self.transform = transform
+        self.crs = crs
+        self.profile = profile
+        self.water_class = water_class
+        self.tiff_path: Optional[str] = None
+        self.shapefile_path: Optional[str] = None
+        self.meta: Dict[str, Any] = {}
+
+    @property
+    def has_polygons(self) -> bool:
+        return self.polygons is not None and not self.polygons.empty
+
+    @property
+    def has_coastline(self) -> bool:
+        return self.coastline is not None and not self.coastline.empty
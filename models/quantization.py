@@ -0,0 +1,58 @@
+import logging
+from typing import Iterable, Optional
+
+import numpy as np
+
+from config.settings import DEFAULT_TILE_SIZE
+from models.backends import PRECISIONS, convert_to_tflite, model_path_for_backend, sample_tiles
+
+logger = logging.getLogger(__name__)
+
+def calibration_tiles(image_paths: Iterable[str], detector, tile_size: int = DEFAULT_TILE_SIZE,
+                      count: int = 64, seed: int = 0) -> np.ndarray:
+    # Tiles go through the detector's own preprocessing so INT8 ranges are
+    # calibrated on exactly what the model sees at inference time.
+    image_paths = list(image_paths)
+    if not image_paths:
+        raise ValueError("Minimal satu citra diperlukan untuk kalibrasi.")
+    per_image = max(1, -(-count // len(image_paths)))
+    tiles = []
+    for i, path in enumerate(image_paths):
+        image = detector.preprocess(path)[0]
+        if image.ndim == 3 and image.shape[0] == 1:
+            image = image[0]
+        tiles.append(sample_tiles(image, tile_size, per_image, seed=seed + i))
+    return np.concatenate(tiles)[:count]
+
+def representative_dataset(tiles: np.ndarray):
+    def generator():
+        for tile in tiles:
+            yield [tile[np.newaxis].astype(np.float32)]
+    return generator
+
+def quantize_model(keras_path: str, precision: str, calibration: Optional[np.ndarray] = None,
+                   output_path: Optional[str] = None) -> str:
+    import tensorflow as tf
+
+    if precision not in PRECISIONS:
+        raise ValueError(f"Presisi tidak dikenali: {precision}. Pilihan: {', '.join(PRECISIONS)}")
+    output_path = output_path or model_path_for_backend(keras_path, "tflite", precision)
+
+    if precision == "float32":
+        return convert_to_tflite(keras_path, output_path)
+    if precision == "float16":
+        return convert_to_tflite(
+            keras_path, output_path,
+            optimizations=[tf.lite.Optimize.DEFAULT],
+            supported_types=[tf.float16]
+        )
+
+    if calibration is None or len(calibration) == 0:
+        raise ValueError("Kuantisasi INT8 memerlukan tile kalibrasi.")
+    # Float input/output keeps the detector-facing contract unchanged; all
+    # internal ops run as INT8.
+    return convert_to_tflite(
+        keras_path, output_path,
+        optimizations=[tf.lite.Optimize.DEFAULT],
+        representative_dataset=representative_dataset(calibration)
+    )
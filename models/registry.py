@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from config.settings import MODEL_CACHE_BUDGET_MB, MODEL_WARMUP, DEFAULT_BATCH_SIZE
+from models.backends import load_backend
+
+logger = logging.getLogger(__name__)
+
+class _Entry:
+    def __init__(self, model, size_mb: float, load_time_s: float):
+        self.model = model
+        self.size_mb = size_mb
+        self.load_time_s = load_time_s
+        self.hits = 0
+        self.warm = threading.Event()
+        self.warmup_time_s = None
+
+class ModelRegistry:
+    def __init__(self, budget_mb: float = MODEL_CACHE_BUDGET_MB, warm_up: bool = MODEL_WARMUP,
+                 warmup_batch_size: int = DEFAULT_BATCH_SIZE):
+        self.budget_mb = budget_mb
+        self.warm_up = warm_up
+        self.warmup_batch_size = warmup_batch_size
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_path: str, backend: str = 'keras') -> Tuple[str, str]:
+        return os.path.abspath(model_path), backend
+
+    def get(self, model_path: str, backend: str = 'keras'):
+        key = self.make_key(model_path, backend)
+        with self._lock:
+            entry = self._hit(key)
+            if entry is not None:
+                return entry.model
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Loading happens outside the registry lock so a slow deserialization
+        # does not block lookups of other models.
+        with load_lock:
+            with self._lock:
+                entry = self._hit(key)
+                if entry is not None:
+                    return entry.model
+
+            start = time.perf_counter()
+            model = load_backend(key[0], backend)
+            load_time = time.perf_counter() - start
+            entry = _Entry(model, self._estimate_size_mb(model, key[0]), load_time)
+
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = entry
+                self._evict(keep=key)
+            logger.info(f"Model loaded into registry: {key[0]} [{backend}] in {load_time:.2f}s ({entry.size_mb:.1f} MB)")
+
+        if self.warm_up:
+            threading.Thread(target=self._warm, args=(key, entry), name="model-warmup", daemon=True).start()
+        else:
+            entry.warm.set()
+        return model
+
+    def wait_until_warm(self, model, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            entry = next((e for e in self._entries.values() if e.model is model), None)
+        if entry is None:
+            return True
+        return entry.warm.wait(timeout)
+
+    def evict(self, model_path: str, backend: str = 'keras') -> bool:
+        with self._lock:
+            entry = self._entries.pop(self.make_key(model_path, backend), None)
+            if entry is not None:
+                self.evictions += 1
+            return entry is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'resident_mb': round(self._resident_mb(), 2),
+                'budget_mb': self.budget_mb,
+                'models': {
+                    f"{path} [{backend}]": {
+                        'size_mb': round(e.size_mb, 2),
+                        'load_time_s': round(e.load_time_s, 4),
+                        'warmup_time_s': None if e.warmup_time_s is None else round(e.warmup_time_s, 4),
+                        'hits': e.hits,
+                    }
+                    for (path, backend), e in self._entries.items()
+                },
+            }
+
+    def _hit(self, key) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.hits += 1
+        return entry
+
+    def _resident_mb(self) -> float:
+        return sum(e.size_mb for e in self._entries.values())
+
+    def _evict(self, keep) -> None:
+        while self._resident_mb() > self.budget_mb and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                self._entries.move_to_end(key)
+                continue
+            self._entries.pop(key)
+            self.evictions += 1
+            logger.info(f"Model evicted from registry: {key[0]} [{key[1]}]")
+
+    @staticmethod
+    def _estimate_size_mb(model, model_path: str) -> float:
+        count_params = getattr(model, 'count_params', None)
+        if callable(count_params):
+            try:
+                return count_params() * 4 / (1024 * 1024)
+            except Exception:
+                pass
+        try:
+            return os.path.getsize(model_path) / (1024 * 1024)
+        except OSError:
+            return 0.0
+
+    def _warm(self, key, entry: _Entry) -> None:
+        # One dummy batch at the inference batch size, so graph tracing
+        # happens here instead of on the first real tile batch.
+        try:
+            input_shape = getattr(entry.model, 'input_shape', None)
+            if input_shape is None or any(d is None for d in input_shape[1:]):
+                return
+            start = time.perf_counter()
+            dummy = np.zeros((self.warmup_batch_size, *input_shape[1:]), dtype=np.float32)
+            entry.model.predict(dummy, verbose=0)
+            entry.warmup_time_s = time.perf_counter() - start
+            logger.info(f"Model warmed up: {key[0]} [{key[1]}] in {entry.warmup_time_s:.2f}s")
+        except Exception as e:
+            logger.warning(f"Model warm-up failed for {key[0]}: {str(e)}")
+        finally:
+            entry.warm.set()
+
+model_registry = ModelRegistry()
@@ -0,0 +1,52 @@
+import numpy as np
+import rasterio
+import shapely
+from rasterio.transform import from_origin
+
+from core.pipeline import run_streaming_detection
+from models.coastline_detector import UAVCoastlineDetector
+from utils.preprocess import iter_stream_windows
+
+class MeanModel:
+    # Water probability is the mean of the tile's channels.
+    def predict(self, x, verbose=0):
+        water = x.mean(-1)
+        return np.stack([1 - water, water], -1)
+
+def write_scene(path, height, width):
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[:height, :width]
+    water = (np.sin(xx / 40) + np.cos(yy / 3)) > 0
+    bands = np.stack([water * 3000 + rng.integers(0, 1500, (height, width)) for _ in range(3)]).astype("uint16")
+    with rasterio.open(path, "w", driver="GTiff", height=height, width=width, count=3, dtype="uint16",
+                       crs="EPSG:32748", transform=from_origin(500000, 9000000, 1, 1),
+                       tiled=True, blockxsize=256, blockysize=256) as dst:
+        dst.write(bands)
+
+def test_streaming_tail_shorter_than_halo(tmp_path):
+    path = str(tmp_path / "scene.tif")
+    write_scene(path, 1029, 512)
+    detector = UAVCoastlineDetector()
+    detector.model = MeanModel()
+    window_pixels = 1024 * 512
+
+    with rasterio.open(path) as src:
+        heights = [w.height for w in iter_stream_windows(src, max_pixels=window_pixels)]
+    assert heights[-1] < detector.stream_halo
+
+    result, _ = run_streaming_detection(detector, path, str(tmp_path / "mask.tif"), window_pixels=window_pixels)
+
+    image, _, transform, crs = detector.preprocess(path)
+    mask, _ = detector.detect(image)
+    expected = detector.postprocess(mask, transform, crs)
+    with rasterio.open(result.tiff_path) as src:
+        assert np.array_equal(src.read(1), expected.mask)
+    assert_same_polygons(result.polygons.geometry.values, expected.polygons.geometry.values)
+
+def assert_same_polygons(actual, expected):
+    # Same set of polygons, in any order.
+    assert len(actual) == len(expected)
+    left, right = shapely.STRtree(expected).query(actual, predicate="covers")
+    equal = shapely.equals(actual[left], expected[right])
+    assert set(left[equal]) == set(range(len(actual)))
+    assert set(right[equal]) == set(range(len(expected)))
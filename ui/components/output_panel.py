@@ -8,11 +8,6 @@ from ..styles.component_styles import (
     INPUT_PREVIEW_LABEL_STYLE, DOWNLOAD_BUTTON_STYLE
 )
 from ..styles.base_styles import PANEL_STYLE
-from utils.image_processor import (
-    generate_input_preview,
-    generate_output_mask_preview,
-    generate_shapefile_preview
-)
 
 class OutputPanelComponent(QtWidgets.QFrame):
     def __init__(self):
@@ -96,6 +91,7 @@ class OutputPanelComponent(QtWidgets.QFrame):
         self.layout().addWidget(self.downloadButton)
 
     def updateInputPreview(self, image_path):
+        from utils.image_processor import generate_input_preview
         try:
             print(f"[DEBUG] Membuka file: {image_path}")
             pixmap = generate_input_preview(
@@ -111,14 +107,16 @@ class OutputPanelComponent(QtWidgets.QFrame):
             QMessageBox.critical(self, "Gagal Menampilkan Preview", str(e))
             print(f"[ERROR] updateInputPreview: {e}")
 
-    def updateOutputPreview(self, output_path):
-        if not os.path.exists(output_path):
-            print(f"File tidak ditemukan: {output_path}")
+    def updateOutputPreview(self, source):
+        # `source` is a mask TIFF path or the detection's in-memory mask.
+        if isinstance(source, str) and not os.path.exists(source):
+            print(f"File tidak ditemukan: {source}")
             return
 
+        from utils.image_processor import generate_output_mask_preview
         try:
             pixmap = generate_output_mask_preview(
-                output_path,
+                source,
                 self.outputImageLabel.width(),
                 self.outputImageLabel.height()
             )
@@ -127,9 +125,11 @@ class OutputPanelComponent(QtWidgets.QFrame):
             QMessageBox.critical(self, "Gagal Menampilkan Output", str(e))
             print(f"[ERROR] updateOutputPreview: {e}")
 
-    def updateShapefilePreview(self, shapefile_path):
+    def updateShapefilePreview(self, source):
+        # `source` is a shapefile path or the detection's in-memory coastline.
+        from utils.image_processor import generate_shapefile_preview
         try:
-            pixmap = generate_shapefile_preview(shapefile_path)
+            pixmap = generate_shapefile_preview(source)
             self.outputShapefile.setPixmap(pixmap)
             self.outputShapefile.setAlignment(Qt.AlignCenter)
         except Exception as e:
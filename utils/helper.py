@@ -1,12 +1,14 @@
 import os
 import sys
-import rasterio
 import numpy as np
-from typing import Union
-from keras.models import Model
-from PyQt5.QtWidgets import QMessageBox
+from typing import Union, TYPE_CHECKING
+from config.settings import DEFAULT_BATCH_SIZE
+
+if TYPE_CHECKING:
+    from models.backends import InferenceBackend
 
 def show_warning_dialog(parent, title: str, message: str):
+    from PyQt5.QtWidgets import QMessageBox
     warning_box = QMessageBox(parent)
     warning_box.setIcon(QMessageBox.Warning)
     warning_box.setWindowTitle(title)
@@ -15,6 +17,7 @@ def show_warning_dialog(parent, title: str, message: str):
     warning_box.exec_()
 
 def load_raster_image(file_path):
+    import rasterio
     try:
         with rasterio.open(file_path) as dataset:
             image_array = dataset.read()
@@ -24,6 +27,14 @@ def load_raster_image(file_path):
     except Exception as e:
         return None, 0, str(e)
 
+def read_raster_info(file_path):
+    import rasterio
+    try:
+        with rasterio.open(file_path) as dataset:
+            return dataset.count, None
+    except Exception as e:
+        return 0, str(e)
+
 def validate_model_selection(model_type, band_count):
     if model_type == "✈️ UAV" and band_count not in [3, 4]:
         return False, "Model UAV memerlukan citra dengan 3 atau 4 band. Mohon pilih file yang sesuai."
@@ -48,12 +59,13 @@ def resource_path(relative_path):
         print("🛠️ Running from script. base_path =", base_path)
     return os.path.join(base_path, relative_path)
 
-def run_patch_prediction(model: Model, image: Union[np.ndarray], tile_size: int = 256, channels_last: bool = True, is_multichannel: bool = True) -> np.ndarray:
-    if model is None:
-        raise ValueError("Model tidak boleh None.")
-    if image is None:
-        raise ValueError("Input image tidak boleh None.")
+def iter_tile_origins(h: int, w: int, tile_size: int):
+    for row in range(0, h, tile_size):
+        for col in range(0, w, tile_size):
+            yield row, col
 
+def as_tile_image(image: np.ndarray, channels_last: bool = True, is_multichannel: bool = True) -> np.ndarray:
+    # Normalizes the accepted input layouts to (H, W, C).
     if not is_multichannel:
         if image.ndim == 3 and image.shape[0] == 1:
             image = image[0]
@@ -61,35 +73,59 @@ def run_patch_prediction(model: Model, image: Union[np.ndarray], tile_size: int
             image = image[:, :, 0]
         elif image.ndim != 2:
             raise ValueError(f"Input image shape tidak valid untuk single-channel: {image.shape}")
-        h, w = image.shape
-        c = 1
-    else:
-        if image.ndim != 3:
-            raise ValueError(f"Input image shape tidak valid untuk multichannel: {image.shape}")
-        if channels_last:
-            h, w, c = image.shape
-        else:
-            c, h, w = image.shape
-            image = np.transpose(image, (1, 2, 0))
+        return image[:, :, np.newaxis]
+    if image.ndim != 3:
+        raise ValueError(f"Input image shape tidak valid untuk multichannel: {image.shape}")
+    if channels_last:
+        return image
+    return np.transpose(image, (1, 2, 0))
 
-    mask = np.zeros((h, w), dtype=np.uint8)
+def predict_tiles(model: "InferenceBackend", image: np.ndarray, mask: np.ndarray, origins, tile_size: int,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    h, w, c = image.shape
 
-    for row in range(0, h, tile_size):
-        for col in range(0, w, tile_size):
+    # One reusable input tensor; edge tiles keep zero padding because the
+    # slot is cleared before a partial tile is copied in.
+    batch = np.zeros((batch_size, tile_size, tile_size, c), dtype=np.float32)
+    pending = []
+    count = 0
+
+    def flush():
+        n = len(pending)
+        pred = model.predict(batch[:n], verbose=0)
+        labels = np.argmax(pred, axis=-1).astype(np.uint8, copy=False)
+        for i, (row, col) in enumerate(pending):
             patch_h = min(tile_size, h - row)
             patch_w = min(tile_size, w - col)
-            patch = image[row:row + patch_h, col:col + patch_w]
+            mask[row:row + patch_h, col:col + patch_w] = labels[i, :patch_h, :patch_w]
+        pending.clear()
 
-            padded = np.zeros((tile_size, tile_size, c), dtype=np.float32)
-            if is_multichannel:
-                padded[:patch_h, :patch_w, :] = patch
-            else:
-                padded[:patch_h, :patch_w, 0] = patch
+    for row, col in origins:
+        patch_h = min(tile_size, h - row)
+        patch_w = min(tile_size, w - col)
+        slot = batch[len(pending)]
+        if patch_h < tile_size or patch_w < tile_size:
+            slot.fill(0)
+        slot[:patch_h, :patch_w, :] = image[row:row + patch_h, col:col + patch_w]
+        pending.append((row, col))
+        count += 1
+        if len(pending) == batch_size:
+            flush()
 
-            input_patch = np.expand_dims(padded, axis=0)
-            pred = model.predict(input_patch, verbose=0)
+    if pending:
+        flush()
+    return count
 
-            pred_mask = np.argmax(pred[0], axis=-1).astype(np.uint8)
-            mask[row:row + patch_h, col:col + patch_w] = pred_mask[:patch_h, :patch_w]
+def run_patch_prediction(model: "InferenceBackend", image: Union[np.ndarray], tile_size: int = 256, channels_last: bool = True, is_multichannel: bool = True, batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+    if model is None:
+        raise ValueError("Model tidak boleh None.")
+    if image is None:
+        raise ValueError("Input image tidak boleh None.")
+    if batch_size < 1:
+        raise ValueError(f"Batch size harus >= 1: {batch_size}")
 
+    image = as_tile_image(image, channels_last, is_multichannel)
+    h, w, _ = image.shape
+    mask = np.zeros((h, w), dtype=np.uint8)
+    predict_tiles(model, image, mask, iter_tile_origins(h, w, tile_size), tile_size, batch_size)
     return mask
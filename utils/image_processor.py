@@ -1,9 +1,47 @@
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QColor
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QColor, QPolygonF, qRgb
+from PyQt5.QtCore import Qt, QPointF
 import rasterio
+from rasterio.enums import Resampling
+from rasterio.windows import Window
 import numpy as np
-import shapefile
-from config.settings import SENTINEL2_BANDS
+import shapely
+from config.settings import (
+    SENTINEL2_BANDS, PREVIEW_RESAMPLING, PREVIEW_STATS_MAX_PIXELS, MASK_COLOR_TABLE, PROBABILITY_COLOR_RAMP,
+    STREAM_WINDOW_PIXELS
+)
+from utils.raster_stats import raster_stats
+
+def preview_shape(src, label_width: int, label_height: int):
+    # Largest size that fits the label with the aspect ratio kept, never
+    # above native resolution.
+    scale = min(label_width / src.width, label_height / src.height, 1.0)
+    return max(1, round(src.height * scale)), max(1, round(src.width * scale))
+
+def _decimation_step(height: int, width: int, preview_height: int, preview_width: int) -> int:
+    return max(1, min(height // preview_height, width // preview_width))
+
+def read_preview(src, bands, label_width: int, label_height: int, resampling: str = PREVIEW_RESAMPLING) -> np.ndarray:
+    h, w = preview_shape(src, label_width, label_height)
+    if src.overviews(bands[0]):
+        # GDAL serves the decimated read from the closest overview level.
+        return src.read(bands, out_shape=(len(bands), h, w), resampling=Resampling[resampling])
+    # Without overviews a resampled GDAL read decodes every block anyway and
+    # is slower than a plain read, so plain reads are decimated instead, one
+    # strip of rows at a time to keep memory bounded on very large scenes.
+    step = _decimation_step(src.height, src.width, h, w)
+    rows = max(1, STREAM_WINDOW_PIXELS // (src.width * step)) * step
+    preview = np.empty((len(bands), -(-src.height // step), -(-src.width // step)), dtype=src.dtypes[bands[0] - 1])
+    for row in range(0, src.height, rows):
+        window = Window(0, row, src.width, min(rows, src.height - row))
+        preview[:, row // step:-(-(row + window.height) // step)] = src.read(bands, window=window)[:, ::step, ::step]
+    return preview
+
+def decimate_preview(array: np.ndarray, label_width: int, label_height: int) -> np.ndarray:
+    # In-memory counterpart of read_preview's plain-read path (nearest).
+    height, width = array.shape[-2:]
+    scale = min(label_width / width, label_height / height, 1.0)
+    step = _decimation_step(height, width, max(1, round(height * scale)), max(1, round(width * scale)))
+    return np.ascontiguousarray(array[..., ::step, ::step])
 
 def generate_input_preview(image_path: str, label_width: int, label_height: int) -> QPixmap:
     with rasterio.open(image_path) as src:
@@ -25,17 +63,26 @@ def generate_input_preview(image_path: str, label_width: int, label_height: int)
                 f"File memiliki {band_count} band, tidak bisa memuat kombinasi band {bands_to_read}."
             )
 
-        bands = [src.read(b) for b in bands_to_read]
-        array = np.stack(bands, axis=-1).astype(np.float32)
+        array = np.moveaxis(read_preview(src, bands_to_read, label_width, label_height), 0, -1).astype(np.float32, order="C")
 
+        # Stretch limits come from the cached histogram of these bands
+        # rather than from sorting the pixels of every preview.
         if is_uav:
-            array -= array.min()
-            if array.max() > 0:
-                array /= array.max()
+            vmin, vmax = raster_stats.percentiles(
+                image_path, bands_to_read, (0, 100), src, max_pixels=PREVIEW_STATS_MAX_PIXELS
+            )
+            array -= vmin
+            if vmax - vmin > 0:
+                array /= vmax - vmin
             array *= 255
+            # The limits come from sampled rows; pixels outside them must
+            # saturate rather than wrap around in the uint8 cast.
+            np.clip(array, 0, 255, out=array)
         else:
             array = np.clip(array, 0, 10000)
-            p2, p98 = np.percentile(array, (2, 98))
+            p2, p98 = np.clip(raster_stats.percentiles(
+                image_path, bands_to_read, (2, 98), src, max_pixels=PREVIEW_STATS_MAX_PIXELS
+            ), 0, 10000)
             array = np.clip((array - p2) / (p98 - p2) * 255, 0, 255)
 
         array = array.astype(np.uint8)
@@ -44,21 +91,97 @@ def generate_input_preview(image_path: str, label_width: int, label_height: int)
         pixmap = QPixmap.fromImage(qimage)
         return pixmap.scaled(label_width, label_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
 
-def generate_output_mask_preview(output_path: str, label_width: int, label_height: int) -> QPixmap:
-    with rasterio.open(output_path) as src:
-        mask = src.read(1)
-        h, w = mask.shape
-        rgb = np.zeros((h, w, 3), dtype=np.uint8)
-        rgb[mask == 0] = [160, 160, 160]
-        rgb[mask == 1] = [0, 102, 204]
+def class_color_table(colors: dict = MASK_COLOR_TABLE) -> list:
+    table = [qRgb(0, 0, 0)] * 256
+    for class_id, (r, g, b) in colors.items():
+        table[class_id] = qRgb(r, g, b)
+    return table
 
-        qimage = QImage(rgb.data, w, h, w * 3, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(qimage)
-        return pixmap.scaled(label_width, label_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+def ramp_color_table(colors=PROBABILITY_COLOR_RAMP) -> list:
+    stops = np.asarray(colors, dtype=np.float64)
+    positions = np.linspace(0, 255, len(stops))
+    ramp = np.stack([np.interp(np.arange(256), positions, stops[:, c]) for c in range(3)], axis=-1)
+    return [qRgb(*rgb) for rgb in ramp.round().astype(int).tolist()]
+
+def indexed_qimage(indices: np.ndarray, color_table: list) -> QImage:
+    # Wraps the uint8 buffer without copying; the image keeps a reference
+    # to it, since Qt does not own the memory.
+    indices = np.ascontiguousarray(indices, dtype=np.uint8)
+    h, w = indices.shape
+    qimage = QImage(indices.data, w, h, indices.strides[0], QImage.Format_Indexed8)
+    qimage.setColorTable(color_table)
+    qimage.buffer = indices
+    return qimage
+
+def _mask_indices(data: np.ndarray):
+    if data.dtype.kind == "f":
+        # Probabilities are quantized to 256 ramp steps.
+        return (np.clip(np.nan_to_num(data), 0.0, 1.0) * 255).round().astype(np.uint8), ramp_color_table()
+    indices = data if data.dtype == np.uint8 else np.clip(data, 0, 255).astype(np.uint8)
+    return indices, class_color_table()
 
-def generate_shapefile_preview(shapefile_path: str, width: int = 400, height: int = 300) -> QPixmap:
-    sf = shapefile.Reader(shapefile_path)
-    shapes = sf.shapes()
+def generate_output_mask_preview(source, label_width: int, label_height: int) -> QPixmap:
+    # `source` is a mask raster path or an in-memory 2-D mask array.
+    if isinstance(source, np.ndarray):
+        data = decimate_preview(source, label_width, label_height)
+    else:
+        with rasterio.open(source) as src:
+            # Class ids must not be blended, so masks are decimated with
+            # nearest; probabilities are averaged.
+            resampling = "average" if np.dtype(src.dtypes[0]).kind == "f" else "nearest"
+            data = read_preview(src, [1], label_width, label_height, resampling=resampling)[0]
+
+    qimage = indexed_qimage(*_mask_indices(data))
+    pixmap = QPixmap.fromImage(qimage)
+    return pixmap.scaled(label_width, label_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+def _polygonf(xy: np.ndarray) -> QPolygonF:
+    # Fills the polygon's QPointF storage (pairs of doubles) from the array
+    # in one copy instead of constructing a QPointF per vertex.
+    polygon = QPolygonF()
+    polygon.fill(QPointF(), len(xy))
+    buffer = polygon.data()
+    buffer.setsize(xy.size * 8)
+    np.frombuffer(buffer, dtype=np.float64).reshape(xy.shape)[:] = xy
+    return polygon
+
+def preview_paths(geometries, width: int, height: int, margin: int = 10):
+    # Rings and lines of the geometries in preview pixel coordinates: a
+    # list of (n, 2) arrays for paths simplified to the pixel size, and an
+    # (m, 2) array of points for paths smaller than a pixel.
+    parts = shapely.get_parts(np.asarray(geometries, dtype=object))
+    parts = parts[~shapely.is_empty(parts)]
+    if len(parts) == 0:
+        return [], np.empty((0, 2))
+    polygonal = shapely.get_type_id(parts) == 3
+    paths = np.concatenate([parts[~polygonal], shapely.get_rings(parts[polygonal])])
+
+    bounds = shapely.bounds(paths)
+    min_x, min_y = bounds[:, 0].min(), bounds[:, 1].min()
+    max_x, max_y = bounds[:, 2].max(), bounds[:, 3].max()
+    scale_x = (width - 2 * margin) / ((max_x - min_x) or 1.0)
+    scale_y = (height - 2 * margin) / ((max_y - min_y) or 1.0)
+
+    def to_pixels(coords):
+        xy = np.empty_like(coords)
+        xy[:, 0] = (coords[:, 0] - min_x) * scale_x + margin
+        xy[:, 1] = (max_y - coords[:, 1]) * scale_y + margin
+        return xy
+
+    visible = ((bounds[:, 2] - bounds[:, 0]) * scale_x >= 1.0) | ((bounds[:, 3] - bounds[:, 1]) * scale_y >= 1.0)
+    points = to_pixels(bounds[~visible, :2])
+
+    paths = shapely.simplify(paths[visible], 1.0 / max(scale_x, scale_y))
+    coords, index = shapely.get_coordinates(paths, return_index=True)
+    stops = np.cumsum(np.bincount(index, minlength=len(paths)))[:-1]
+    return np.split(to_pixels(coords), stops), points
+
+def generate_shapefile_preview(source, width: int = 400, height: int = 300) -> QPixmap:
+    # `source` is a vector file path or an in-memory GeoDataFrame/GeoSeries.
+    if isinstance(source, str):
+        import geopandas as gpd
+        source = gpd.read_file(source)
+    geometries = source.geometry.values if hasattr(source, "geometry") else source
 
     pixmap = QPixmap(width, height)
     pixmap.fill(Qt.white)
@@ -66,24 +189,11 @@ def generate_shapefile_preview(shapefile_path: str, width: int = 400, height: in
     pen = QPen(QColor(0, 102, 204), 2)
     painter.setPen(pen)
 
-    all_points = [pt for shape in shapes for pt in shape.points]
-    xs = [pt[0] for pt in all_points]
-    ys = [pt[1] for pt in all_points]
-    min_x, max_x = min(xs), max(xs)
-    min_y, max_y = min(ys), max(ys)
-
-    def scale_point(x, y):
-        sx = (x - min_x) / (max_x - min_x) * (width - 20) + 10
-        sy = (max_y - y) / (max_y - min_y) * (height - 20) + 10
-        return int(sx), int(sy)
-
-    for shape in shapes:
-        points = [scale_point(x, y) for x, y in shape.points]
-        if len(points) > 1:
-            for i in range(len(points) - 1):
-                painter.drawLine(points[i][0], points[i][1], points[i+1][0], points[i+1][1])
-        else:
-            painter.drawPoint(points[0][0], points[0][1])
+    lines, points = preview_paths(geometries, width, height)
+    for line in lines:
+        painter.drawPolyline(_polygonf(line))
+    if len(points):
+        painter.drawPoints(_polygonf(points))
 
     painter.end()
     return pixmap
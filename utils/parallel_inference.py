@@ -0,0 +1,134 @@
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import DEFAULT_BATCH_SIZE, DEFAULT_TILE_SIZE, INFERENCE_THREADS_PER_WORKER
+from utils.helper import as_tile_image, iter_tile_origins, predict_tiles
+
+logger = logging.getLogger(__name__)
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "TF_NUM_INTRAOP_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+def limit_inference_threads(threads: Optional[int]) -> None:
+    # Only effective before TensorFlow / ONNX Runtime are imported in the process.
+    if not threads:
+        return
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+
+# Per-process state of a tile worker, filled by _init_worker.
+_worker_model = None
+
+def _init_worker(model_path: str, backend: str, threads: Optional[int]) -> None:
+    global _worker_model
+    limit_inference_threads(threads)
+    from models.registry import model_registry
+
+    model_registry.warm_up = False
+    _worker_model = model_registry.get(model_path, backend=backend)
+
+def _attach(name: str, shape, dtype) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _predict_shard(image_spec, mask_spec, origins: List[Tuple[int, int]], tile_size: int, batch_size: int) -> int:
+    image_shm, image = _attach(*image_spec)
+    mask_shm, mask = _attach(*mask_spec)
+    try:
+        # Shards never overlap, so workers write their tiles without locking.
+        return predict_tiles(_worker_model, image, mask, origins, tile_size, batch_size)
+    finally:
+        del image, mask
+        image_shm.close()
+        mask_shm.close()
+
+class ParallelTilePredictor:
+    # Shards the tile grid of one image across worker processes. The image
+    # and the output mask live in shared memory; workers only receive tile
+    # origins. Each worker loads the model once and keeps it for the
+    # lifetime of the pool.
+    def __init__(self, model_path: str, backend: str = "keras", workers: Optional[int] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, threads_per_worker: Optional[int] = INFERENCE_THREADS_PER_WORKER,
+                 shards_per_worker: int = 4):
+        self.model_path = model_path
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        if threads_per_worker is None:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // self.workers)
+        self.threads_per_worker = threads_per_worker
+        self.shards_per_worker = shards_per_worker
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: a forked child would inherit TensorFlow state from the parent.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_path, self.backend, self.threads_per_worker),
+            )
+        return self._pool
+
+    def _shards(self, origins: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+        # Whole batches per shard, with a few shards per worker so a slow
+        # worker does not hold up the rest.
+        shard_count = self.workers * self.shards_per_worker
+        per_shard = -(-len(origins) // shard_count)
+        per_shard = max(self.batch_size, -(-per_shard // self.batch_size) * self.batch_size)
+        return [origins[i:i + per_shard] for i in range(0, len(origins), per_shard)]
+
+    def predict(self, image: np.ndarray, tile_size: int = DEFAULT_TILE_SIZE, channels_last: bool = True,
+                is_multichannel: bool = True) -> np.ndarray:
+        if image is None:
+            raise ValueError("Input image tidak boleh None.")
+        image = as_tile_image(image, channels_last, is_multichannel)
+        h, w, c = image.shape
+        origins = list(iter_tile_origins(h, w, tile_size))
+
+        image_shm = shared_memory.SharedMemory(create=True, size=max(1, h * w * c * 4))
+        mask_shm = shared_memory.SharedMemory(create=True, size=max(1, h * w))
+        shared_image = shared_mask = None
+        try:
+            shared_image = np.ndarray((h, w, c), dtype=np.float32, buffer=image_shm.buf)
+            shared_image[:] = image
+            shared_mask = np.ndarray((h, w), dtype=np.uint8, buffer=mask_shm.buf)
+            shared_mask.fill(0)
+
+            image_spec = (image_shm.name, (h, w, c), np.float32)
+            mask_spec = (mask_shm.name, (h, w), np.uint8)
+            pool = self._get_pool()
+            futures = [
+                pool.submit(_predict_shard, image_spec, mask_spec, shard, tile_size, self.batch_size)
+                for shard in self._shards(origins)
+            ]
+            for future in futures:
+                future.result()
+
+            return shared_mask.copy()
+        finally:
+            # Views must be released before the segments can be closed.
+            shared_image = shared_mask = None
+            image_shm.close()
+            image_shm.unlink()
+            mask_shm.close()
+            mask_shm.unlink()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
@@ -1,8 +1,16 @@
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import cv2
+import shapely
 import geopandas as gpd
+from affine import Affine
 from rasterio.features import shapes
-from shapely.geometry import shape, LineString
+
+from config.settings import POLYGONIZE_WORKERS, POLYGONIZE_STRIP_ROWS, POLYGONIZE_TILED_MIN_PIXELS
 
 
 def morphological_smooth(mask, kernel_size=3, iterations=1):
@@ -10,26 +18,189 @@ def morphological_smooth(mask, kernel_size=3, iterations=1):
     opened = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=iterations)
     closed = cv2.morphologyEx(opened, cv2.MORPH_CLOSE, kernel, iterations=iterations)
     return closed
+
+def _polygons_from_rings(rings: list, ring_polygon: list) -> np.ndarray:
+    # Builds all polygons in bulk from GeoJSON-style rings (lists of (x, y)
+    # tuples): one flat coordinate array, then shapely's indexed
+    # constructors; the first ring of each polygon is its shell.
+    if not rings:
+        return np.empty(0, dtype=object)
+    lengths = np.fromiter(map(len, rings), dtype=np.int64, count=len(rings))
+    coords = np.fromiter(
+        itertools.chain.from_iterable(itertools.chain.from_iterable(rings)), dtype=np.float64, count=2 * lengths.sum()
+    ).reshape(-1, 2)
+    linear_rings = shapely.linearrings(coords, indices=np.repeat(np.arange(len(rings)), lengths))
+    return shapely.polygons(linear_rings, indices=np.asarray(ring_polygon))
+
+def polygonize_strip(strip: np.ndarray, row_offset: int = 0, value: int = 1) -> np.ndarray:
+    # Polygons of the `value` regions in pixel coordinates of the full mask
+    # (x = column, y = row), so seams between strips fall on exact integers.
+    rings, ring_polygon = [], []
+    count = 0
+    for geom, val in shapes(strip, strip > 0, transform=Affine.translation(0, row_offset)):
+        if val == value:
+            rings.extend(geom['coordinates'])
+            ring_polygon.extend([count] * len(geom['coordinates']))
+            count += 1
+    return _polygons_from_rings(rings, ring_polygon)
+
+def _polygonize_strip_wkb(strip: np.ndarray, row_offset: int) -> bytes:
+    # Worker side: WKB pickles much faster than geometry objects.
+    return shapely.to_wkb(polygonize_strip(strip, row_offset))
+
+# One strip pool per process, started on the first tiled mask and reused by
+# every later one; asking for a different size replaces it.
+_strip_pool = None
+_strip_pool_workers = 0
+_strip_pool_lock = threading.Lock()
+
+def _get_strip_pool(workers: int) -> ProcessPoolExecutor:
+    global _strip_pool, _strip_pool_workers
+    with _strip_pool_lock:
+        if _strip_pool is None or _strip_pool_workers != workers:
+            if _strip_pool is not None:
+                _strip_pool.shutdown()
+            _strip_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _strip_pool_workers = workers
+        return _strip_pool
+
+def _merge_seam_polygons(geoms: np.ndarray, strip_ids: np.ndarray, seam_rows: np.ndarray) -> np.ndarray:
+    # A region cut by a seam comes out as one polygon per strip. Pieces from
+    # different strips that share an edge (not just a corner, the regions
+    # are 4-connected) are the same region and are unioned back together.
+    bounds = shapely.bounds(geoms)
+    on_seam = np.isin(bounds[:, 1], seam_rows) | np.isin(bounds[:, 3], seam_rows)
+    if not on_seam.any():
+        return geoms
+    pieces, piece_strips = geoms[on_seam], strip_ids[on_seam]
+
+    left, right = shapely.STRtree(pieces).query(pieces, predicate="intersects")
+    pairs = (left < right) & (piece_strips[left] != piece_strips[right])
+    left, right = left[pairs], right[pairs]
+    shared_edge = shapely.length(shapely.intersection(pieces[left], pieces[right])) > 0
+
+    parent = np.arange(len(pieces))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for i, j in zip(left[shared_edge], right[shared_edge]):
+        parent[find(i)] = find(j)
+
+    groups = {}
+    for i in range(len(pieces)):
+        groups.setdefault(find(i), []).append(i)
+    merged = [pieces[ids[0]] if len(ids) == 1 else _union_pieces(pieces[ids]) for ids in groups.values()]
+    return np.concatenate([geoms[~on_seam], np.array(merged, dtype=object)])
+
+def _union_pieces(pieces: np.ndarray):
+    # Unioning the pieces directly is slow when they carry thousands of
+    # holes. Holes never touch a seam (they would be notches in the outline
+    # instead), so only the outlines are unioned, which also closes notches
+    # facing each other into holes, and the pieces' own holes are put back.
+    union = shapely.union_all(shapely.polygons(shapely.get_exterior_ring(pieces)))
+    rings, index = shapely.get_rings(pieces, return_index=True)
+    holes = rings[np.r_[False, index[1:] == index[:-1]]]
+    return shapely.polygons(union.exterior, np.concatenate([np.array(union.interiors, dtype=object), holes]))
+
+def polygonize_mask(mask: np.ndarray, workers: int = POLYGONIZE_WORKERS, strip_rows: int = POLYGONIZE_STRIP_ROWS,
+                    tiled_min_pixels: int = POLYGONIZE_TILED_MIN_PIXELS) -> np.ndarray:
+    # Water polygons of the mask in pixel coordinates. Large masks are split
+    # into row strips polygonized in parallel, then stitched at the seams;
+    # the result is geometrically the same as one pass over the whole mask.
+    mask = mask.astype(np.uint8, copy=False)
+    height = mask.shape[0]
+    if workers <= 1 or mask.size < tiled_min_pixels or height <= strip_rows:
+        return polygonize_strip(mask)
+
+    offsets = list(range(0, height, strip_rows))
+    pool = _get_strip_pool(workers)
+    results = list(pool.map(_polygonize_strip_wkb, (mask[r:r + strip_rows] for r in offsets), offsets))
+
+    return merge_strip_polygons([shapely.from_wkb(wkb) for wkb in results], offsets)
+
+def merge_strip_polygons(strips: list, offsets: list) -> np.ndarray:
+    # Stitches the per-strip polygons of polygonize_strip (strip i starting
+    # at row offsets[i]) into the polygons of the whole mask.
+    if not strips:
+        return np.empty(0, dtype=object)
+    geoms = np.concatenate(strips)
+    strip_ids = np.repeat(np.arange(len(strips)), [len(s) for s in strips])
+    geoms = _merge_seam_polygons(geoms, strip_ids, np.asarray(offsets[1:], dtype=np.float64))
+
+    # Scan order (top row, then left column), as in a single pass.
+    bounds = shapely.bounds(geoms)
+    return geoms[np.lexsort((bounds[:, 0], bounds[:, 1]))]
+
+def pixel_to_world(geoms: np.ndarray, transform) -> np.ndarray:
+    # Same arithmetic and order as GDAL's geotransform, so coordinates are
+    # identical to polygonizing with the transform directly.
+    a, b, c, d, e, f = transform[:6]
+    return shapely.transform(geoms, lambda xy: np.column_stack([
+        c + a * xy[:, 0] + b * xy[:, 1],
+        f + d * xy[:, 0] + e * xy[:, 1],
+    ]))
   
-def mask_to_polygons(mask, transform, crs):
-    shapes_gen = shapes(mask.astype(np.uint8), mask > 0, transform=transform)
-    geoms = []
-    classes = []
-    for geom, val in shapes_gen:
-        if val == 1:
-            geoms.append(shape(geom))
-            classes.append(val)
-    gdf = gpd.GeoDataFrame({'geometry': geoms, 'class_id': classes}, crs=crs)
-    return gdf
+def polygons_to_gdf(geoms: np.ndarray, transform, crs):
+    # Pixel-space polygons -> the water polygon frame of mask_to_polygons.
+    geoms = pixel_to_world(geoms, transform)
+    return gpd.GeoDataFrame({'geometry': geoms, 'class_id': np.ones(len(geoms))}, crs=crs)
+
+def mask_to_polygons(mask, transform, crs, workers: int = POLYGONIZE_WORKERS):
+    return polygons_to_gdf(polygonize_mask(mask, workers=workers), transform, crs)
   
 def extract_coastline(polygons_gdf, water_class=1):
-    coastlines = []
-    water_polygons = polygons_gdf[polygons_gdf['class_id'] == water_class]
-    for poly in water_polygons.geometry:
-        if poly.geom_type == 'Polygon':
-            coastlines.append(LineString(poly.exterior.coords))
-        elif poly.geom_type == 'MultiPolygon':
-            for subpoly in poly.geoms:
-                coastlines.append(LineString(subpoly.exterior.coords))
+    # Outer ring of every water polygon (of every part of a MultiPolygon)
+    # as a LineString, built in bulk from one coordinate array.
+    water_polygons = polygons_gdf.geometry[polygons_gdf['class_id'] == water_class]
+    parts = water_polygons.explode(index_parts=False).values
+    parts = parts[(shapely.get_type_id(parts) == 3) & ~shapely.is_empty(parts)]
+    coords, index = shapely.get_coordinates(shapely.get_exterior_ring(parts), return_index=True)
+    coastlines = shapely.linestrings(coords, indices=index) if len(coords) else np.empty(0, dtype=object)
     coastline_gdf = gpd.GeoDataFrame({'geometry': coastlines}, crs=polygons_gdf.crs)
-    return coastline_gdf
\ No newline at end of file
+    return coastline_gdf
+
+def simplify_coastline(coastline_gdf, transform, simplify_pixels=None, merge_lines=True):
+    # Merges lines that continue each other into one feature and simplifies
+    # them with a tolerance of `simplify_pixels` pixels in map units.
+    # Returns the new frame and its line/vertex counts before and after.
+    lines = coastline_gdf.geometry.values
+    stats = {
+        'lines_before': len(lines),
+        'vertices_before': int(shapely.get_num_coordinates(lines).sum()),
+        'tolerance': None,
+    }
+    if merge_lines and len(lines):
+        lines = shapely.get_parts(shapely.line_merge(shapely.multilinestrings(lines)))
+    if simplify_pixels:
+        stats['tolerance'] = simplify_pixels * abs(transform.determinant) ** 0.5
+        lines = shapely.simplify(lines, stats['tolerance'], preserve_topology=True)
+    stats['lines'] = len(lines)
+    stats['vertices'] = int(shapely.get_num_coordinates(lines).sum())
+    stats['vertex_reduction_ratio'] = round(1 - stats['vertices'] / stats['vertices_before'], 4) if stats['vertices_before'] else 0.0
+    return gpd.GeoDataFrame({'geometry': lines}, crs=coastline_gdf.crs), stats
+
+def contour_coastline(mask, transform, crs, water_class=1):
+    # Coastline traced straight from the mask, without building polygons:
+    # the outer contours (RETR_CCOMP top level) of the water regions, one
+    # closed line each. OpenCV traces 8-connected regions through the
+    # centres of their boundary pixels, so lines run half a pixel inside
+    # the polygon outlines, diagonal touches join regions, and single-pixel
+    # water bodies have no outline and are skipped.
+    water = (mask == water_class).astype(np.uint8)
+    contours, hierarchy = cv2.findContours(water, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+    outer = [c for c, h in zip(contours, hierarchy[0] if hierarchy is not None else []) if h[3] == -1 and len(c) > 1]
+    if not outer:
+        return gpd.GeoDataFrame({'geometry': []}, geometry='geometry', crs=crs)
+
+    lengths = np.array([len(c) for c in outer])
+    pixels = np.concatenate(outer).reshape(-1, 2).astype(np.float64) + 0.5
+    # Close each ring by repeating its first vertex after its last one.
+    ends = np.cumsum(lengths)
+    pixels = np.insert(pixels, ends, pixels[ends - lengths], axis=0)
+
+    a, b, c, d, e, f = transform[:6]
+    coords = np.column_stack([c + a * pixels[:, 0] + b * pixels[:, 1], f + d * pixels[:, 0] + e * pixels[:, 1]])
+    lines = shapely.linestrings(coords, indices=np.repeat(np.arange(len(outer)), lengths + 1))
+    return gpd.GeoDataFrame({'geometry': lines}, crs=crs)
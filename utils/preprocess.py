@@ -1,80 +1,204 @@
+import math
 import numpy as np
 import rasterio
+from rasterio.windows import Window
 
 from typing import Tuple
-from config.settings import SENTINEL2_BANDS
+from config.settings import SENTINEL2_BANDS, SENTINEL2_INDICES, DEFAULT_TILE_SIZE, STREAM_WINDOW_PIXELS, UAV_ENHANCEMENT
+from utils.spectral import required_bands, normalized_difference, compute_indices
+from utils.raster_stats import raster_stats
 
-def preprocess_image_uav(image_path):
+UAV_BANDS = [1, 2, 3]
+
+def iter_stream_windows(src, tile_size: int = DEFAULT_TILE_SIZE, max_pixels: int = STREAM_WINDOW_PIXELS):
+    # Full-width row strips whose height is a multiple of both the internal
+    # block height and the inference tile size, so every strip starts on a
+    # block boundary and the tile grid matches the whole-scene path.
+    block_h, _ = src.block_shapes[0]
+    rows_budget = max(tile_size, max_pixels // max(src.width, 1))
+    unit = math.lcm(block_h, tile_size)
+    if unit > rows_budget:
+        unit = tile_size
+    rows = max(unit, rows_budget // unit * unit)
+
+    for row in range(0, src.height, rows):
+        yield Window(0, row, src.width, min(rows, src.height - row))
+
+_LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+def _stretch(image, stats, **_):
+    image -= stats['min']
+    image /= stats['max'] - stats['min'] + np.float32(1e-6)
+    np.clip(image, 0, 1, out=image)
+
+def _gamma(image, stats, gamma=1.0):
+    np.power(image, np.float32(gamma), out=image)
+
+def _brightness(image, stats, offset=0.0):
+    image += np.float32(offset)
+    np.clip(image, 0, 1, out=image)
+
+def _contrast(image, stats, amount=0.0):
+    # Pivots on the scene mean of its input: the image's own mean for a
+    # whole scene, the one stream_stats computed for a streaming window.
+    mean = stats.get('mean')
+    if mean is None:
+        mean = image.mean(axis=(0, 1), dtype=np.float64).astype(np.float32)
+    image -= mean
+    image *= np.float32(1 + amount)
+    image += mean
+    np.clip(image, 0, 1, out=image)
+
+def _saturation(image, stats, factor=1.0):
+    gray = np.dot(image, _LUMA_WEIGHTS)[..., np.newaxis]
+    image -= gray
+    image *= np.float32(factor)
+    image += gray
+    np.clip(image, 0, 1, out=image)
+
+# name -> (operator, test whether the parameters make it an identity)
+UAV_OPERATORS = {
+    'stretch': (_stretch, lambda p: False),
+    'gamma': (_gamma, lambda p: p.get('gamma', 1.0) == 1.0),
+    'brightness': (_brightness, lambda p: p.get('offset', 0.0) == 0.0),
+    'contrast': (_contrast, lambda p: p.get('amount', 0.0) == 0.0),
+    'saturation': (_saturation, lambda p: p.get('factor', 1.0) == 1.0),
+}
+
+def build_uav_pipeline(stages=UAV_ENHANCEMENT) -> list:
+    pipeline = []
+    for name, params in stages:
+        if name not in UAV_OPERATORS:
+            raise ValueError(f"Operator UAV tidak dikenali: {name}. Pilihan: {', '.join(UAV_OPERATORS)}")
+        operator, is_identity = UAV_OPERATORS[name]
+        if not is_identity(params):
+            pipeline.append((name, operator, params))
+    return pipeline
+
+_DEFAULT_UAV_PIPELINE = build_uav_pipeline()
+
+def _to_float32_hwc(bands: np.ndarray) -> np.ndarray:
+    # (C, H, W) as read by rasterio -> one contiguous float32 (H, W, C) buffer.
+    image = np.empty((bands.shape[1], bands.shape[2], bands.shape[0]), dtype=np.float32)
+    image[...] = np.moveaxis(bands, 0, -1)
+    return image
+
+def channel_min_max(bands: np.ndarray):
+    # Per band on the native (C, H, W) layout, so each reduction is contiguous.
+    min_vals = np.array([band.min() for band in bands], dtype=np.float32)
+    max_vals = np.array([band.max() for band in bands], dtype=np.float32)
+    return min_vals, max_vals
+
+def enhance_uav(image, min_vals, max_vals, pipeline=None, stats: dict = None):
+    # Runs in place when `image` is already a float32 buffer.
+    image = np.asarray(image, dtype=np.float32)
+    stats = dict(stats or {})
+    stats['min'] = np.asarray(min_vals, dtype=np.float32)
+    stats['max'] = np.asarray(max_vals, dtype=np.float32)
+    means = stats.get('means', {})
+    for index, (_, operator, params) in enumerate(pipeline if pipeline is not None else _DEFAULT_UAV_PIPELINE):
+        stats['mean'] = means.get(index)
+        operator(image, stats, **params)
+    return image
+
+def preprocess_image_uav(image_path, pipeline=None):
     with rasterio.open(image_path) as src:
-        image = src.read([1, 2, 3])
-        image = np.transpose(image, (1, 2, 0))
+        bands = src.read(UAV_BANDS)
         profile = src.profile
         transform = src.transform
         crs = src.crs
 
-    if image is None or image.size == 0:
+    if bands is None or bands.size == 0:
         raise ValueError(f"Gagal membaca gambar dari: {image_path}")
 
-    image = image.astype(np.float32)
+    min_vals, max_vals = channel_min_max(bands)
+    image = _to_float32_hwc(bands)
+    del bands
+    image = enhance_uav(image, min_vals, max_vals, pipeline)
 
-    min_vals = np.percentile(image, 0.0, axis=(0, 1))
-    max_vals = np.percentile(image, 100.0, axis=(0, 1))
-    stretched = (image - min_vals) / (max_vals - min_vals + 1e-6)
-    image = np.clip(stretched, 0, 1)
+    return image, profile, transform, crs
 
-    gamma = 1.0
-    image = np.power(image, gamma)
+def compute_uav_channel_stats(src, windows, pipeline=None) -> dict:
+    # Per-band range from the cached histograms, so re-running a scene does
+    # not scan the file again.
+    ranges = [raster_stats.band_range(src.name, band, src) for band in UAV_BANDS]
+    stats = {
+        'min': np.array([r[0] for r in ranges], dtype=np.float32),
+        'max': np.array([r[1] for r in ranges], dtype=np.float32),
+    }
+    stats['means'] = _scene_stage_means(src, windows, stats, pipeline if pipeline is not None else _DEFAULT_UAV_PIPELINE)
+    return stats
 
-    brightness = 0.0
-    image = image + brightness
-    image = np.clip(image, 0, 1)
+def _scene_stage_means(src, windows, stats: dict, pipeline) -> dict:
+    # Per-band mean over the whole scene of each contrast stage's input, by
+    # pipeline position; costs one extra pass over the scene per stage.
+    means = {}
+    for index, (name, _, _) in enumerate(pipeline):
+        if name != 'contrast':
+            continue
+        total = np.zeros(len(UAV_BANDS), dtype=np.float64)
+        count = 0
+        for window in windows:
+            image = _to_float32_hwc(src.read(UAV_BANDS, window=window))
+            image = enhance_uav(image, stats['min'], stats['max'], pipeline[:index], dict(stats, means=means))
+            total += image.sum(axis=(0, 1), dtype=np.float64)
+            count += image.shape[0] * image.shape[1]
+        means[index] = (total / max(count, 1)).astype(np.float32)
+    return means
 
-    contrast = 0.0
-    mean = np.mean(image, axis=(0, 1), keepdims=True)
-    image = (image - mean) * (1 + contrast) + mean
-    image = np.clip(image, 0, 1)
+def preprocess_uav_window(src, window, stats: dict, pipeline=None) -> np.ndarray:
+    image = _to_float32_hwc(src.read(UAV_BANDS, window=window))
+    return enhance_uav(image, stats['min'], stats['max'], pipeline, stats)
 
-    saturation = 1.68
-    gray = np.dot(image, [0.299, 0.587, 0.114])[..., np.newaxis]
-    image = gray + (image - gray) * saturation
-    image = np.clip(image, 0, 1)
+def read_sentinel_bands(src, band_names, window=None) -> dict:
+    # One float32 buffer per requested band, filled by GDAL directly from
+    # the file; bands the file does not have stay zero.
+    if window is None:
+        window = Window(0, 0, src.width, src.height)
+    shape = (int(window.height), int(window.width))
+    bands = {}
+    for band_name in band_names:
+        index = SENTINEL2_BANDS[band_name] + 1
+        if index > src.count:
+            bands[band_name] = np.zeros(shape, dtype=np.float32)
+            continue
+        buffer = np.empty(shape, dtype=np.float32)
+        src.read(index, out=buffer, window=window)
+        bands[band_name] = buffer
+    return bands
 
-    return image, profile, transform, crs
-  
-def preprocess_sentinel2(image_path, ndwi_threshold=0.5):
+def read_sentinel_stack(src) -> np.ndarray:
+    bands = np.zeros((13, src.height, src.width), dtype=np.float32)
+    for i in range(min(13, src.count)):
+        src.read(i + 1, out=bands[i])
+    return bands
+
+def preprocess_sentinel2(image_path, ndwi_threshold=0.5, return_bands: bool = False, indices=SENTINEL2_INDICES):
     with rasterio.open(image_path) as src:
-        all_bands = src.read()
+        selected = read_sentinel_bands(src, required_bands(indices))
+        bands = read_sentinel_stack(src) if return_bands else None
         profile = src.profile
         transform = src.transform
         crs = src.crs
 
-    num_bands = all_bands.shape[0]
-    bands = np.zeros((13, *all_bands.shape[1:]), dtype=np.float32)
-
-    for i in range(min(13, num_bands)):
-        bands[i] = all_bands[i].astype(np.float32)
+    index_stack = compute_index_stack(selected, indices, ndwi_threshold)
 
-    try:
-        band_green = bands[SENTINEL2_BANDS['B3']]
-        band_nir = bands[SENTINEL2_BANDS['B8']]
-    except IndexError:
-        raise ValueError("Citra tidak memiliki band B3 atau B8 yang diperlukan untuk NDWI.")
+    return index_stack, profile, transform, crs, bands
 
-    ndwi = compute_ndwi(band_green, band_nir, threshold=ndwi_threshold)
-    ndwi_stack = np.expand_dims(ndwi, axis=0)
+def preprocess_sentinel2_window(src, window, ndwi_threshold=0.5, indices=SENTINEL2_INDICES) -> np.ndarray:
+    selected = read_sentinel_bands(src, required_bands(indices), window)
+    return compute_index_stack(selected, indices, ndwi_threshold)
 
-    return ndwi_stack, profile, transform, crs, bands
+def compute_index_stack(bands: dict, indices, ndwi_threshold=0.5) -> np.ndarray:
+    # (len(indices), H, W) float32 in the order of `indices`; the threshold
+    # applies to NDWI, as in compute_ndwi.
+    indices = list(indices)
+    stack = np.empty((len(indices), *next(iter(bands.values())).shape), dtype=np.float32)
+    compute_indices(bands, indices, thresholds={'ndwi': ndwi_threshold}, out=stack)
+    return stack
   
 def compute_ndwi(band_green, band_nir, threshold=0.2):
-    denominator = band_green + band_nir
-    denominator = np.where(denominator == 0, 1e-8, denominator)
-    
-    ndwi = (band_green - band_nir) / denominator
-    
-    ndwi = np.nan_to_num(ndwi, nan=0.0, posinf=1.0, neginf=-1.0)
-    
-    ndwi_normalized = (ndwi + 1) / 2
-    
-    ndwi_normalized = np.where(ndwi_normalized < threshold, 0.0, ndwi_normalized)
-    
-    return ndwi_normalized
\ No newline at end of file
+    return normalized_difference(
+        np.asarray(band_green, dtype=np.float32), np.asarray(band_nir, dtype=np.float32),
+        normalize=True, threshold=threshold
+    )
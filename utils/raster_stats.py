@@ -0,0 +1,158 @@
+import os
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from rasterio.windows import Window
+
+from config.settings import PERCENTILE_HISTOGRAM_BINS, RASTER_STATS_CACHE_SIZE, STREAM_WINDOW_PIXELS
+
+logger = logging.getLogger(__name__)
+
+class BandHistogram:
+    # Value histogram of one or more bands pooled together. Unsigned 8/16-bit
+    # data gets one bin per integer value, so percentiles are exact; other
+    # data types use `bins` equal-width bins between min and max, and a
+    # percentile is off by at most one bin width (`error_bound`).
+    def __init__(self, counts: np.ndarray, start: float, width: float, exact: bool, vmin: float, vmax: float):
+        self.counts = counts
+        self.start = start
+        self.width = width
+        self.exact = exact
+        self.min = vmin
+        self.max = vmax
+        self._cumulative = np.cumsum(counts, dtype=np.int64)
+
+    @property
+    def total(self) -> int:
+        return int(self._cumulative[-1]) if len(self._cumulative) else 0
+
+    @property
+    def error_bound(self) -> float:
+        return 0.0 if self.exact else self.width
+
+    def _value_at(self, rank: np.ndarray) -> np.ndarray:
+        index = np.searchsorted(self._cumulative, rank, side="right")
+        if self.exact:
+            return self.start + index.astype(np.float64)
+        below = np.where(index > 0, self._cumulative[np.maximum(index - 1, 0)], 0)
+        fraction = (rank - below + 0.5) / np.maximum(self.counts[index], 1)
+        return np.clip(self.start + (index + fraction) * self.width, self.min, self.max)
+
+    def percentile(self, q) -> np.ndarray:
+        # Same linear interpolation between order statistics as np.percentile.
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if self.total == 0:
+            return np.full(q.shape, np.nan)
+        rank = q / 100.0 * (self.total - 1)
+        low = np.floor(rank)
+        v_low = self._value_at(low)
+        v_high = self._value_at(np.ceil(rank))
+        return v_low + (rank - low) * (v_high - v_low)
+
+def _sample_windows(src, max_pixels: int):
+    # Evenly spaced full-width strips, one block row high, covering about
+    # max_pixels: real pixel values from the whole extent, and only the
+    # blocks of the sampled rows are decoded.
+    block_h = src.block_shapes[0][0]
+    strip_count = -(-src.height // block_h)
+    wanted = max(1, min(strip_count, -(-max_pixels // (src.width * block_h))))
+    for index in np.unique(np.linspace(0, strip_count - 1, wanted).round().astype(int)):
+        row = int(index) * block_h
+        yield Window(0, row, src.width, min(block_h, src.height - row))
+
+def _iter_band_data(src, bands: Sequence[int], max_pixels: Optional[int] = None, strip_pixels: int = STREAM_WINDOW_PIXELS):
+    if max_pixels and src.width * src.height > max_pixels:
+        windows = _sample_windows(src, max_pixels)
+    else:
+        # Full-width strips; far fewer histogram merges than per-block reads.
+        rows = max(1, strip_pixels // max(src.width, 1))
+        windows = (Window(0, row, src.width, min(rows, src.height - row)) for row in range(0, src.height, rows))
+    for window in windows:
+        for band in bands:
+            yield src.read(band, window=window)
+
+def compute_histogram(src, bands: Sequence[int], bins: int = PERCENTILE_HISTOGRAM_BINS,
+                      max_pixels: Optional[int] = None) -> BandHistogram:
+    dtype = np.dtype(src.dtypes[bands[0] - 1])
+    if dtype.kind == "u" and dtype.itemsize <= 2:
+        counts = np.zeros(2 ** (8 * dtype.itemsize), dtype=np.int64)
+        for data in _iter_band_data(src, bands, max_pixels):
+            counts += np.bincount(data.ravel(), minlength=len(counts))
+        nonzero = np.flatnonzero(counts)
+        vmin, vmax = (float(nonzero[0]), float(nonzero[-1])) if len(nonzero) else (0.0, 0.0)
+        return BandHistogram(counts, 0.0, 1.0, True, vmin, vmax)
+
+    # Two passes: the range first, then fixed-width bins over it.
+    vmin, vmax = np.inf, -np.inf
+    for data in _iter_band_data(src, bands, max_pixels):
+        data = data[np.isfinite(data)] if data.dtype.kind == "f" else data
+        if data.size:
+            vmin, vmax = min(vmin, float(data.min())), max(vmax, float(data.max()))
+    if not np.isfinite(vmin):
+        return BandHistogram(np.zeros(1, dtype=np.int64), 0.0, 1.0, False, 0.0, 0.0)
+
+    width = (vmax - vmin) / bins or 1.0
+    counts = np.zeros(bins, dtype=np.int64)
+    for data in _iter_band_data(src, bands, max_pixels):
+        data = data.astype(np.float64, copy=False)
+        data = data[np.isfinite(data)]
+        index = np.minimum(((data - vmin) / width).astype(np.int64), bins - 1)
+        counts += np.bincount(index, minlength=bins)
+    return BandHistogram(counts, vmin, width, False, vmin, vmax)
+
+class RasterStatsCache:
+    # Histograms keyed by file identity (path, size, mtime), band tuple and
+    # pixel budget, so a rewritten file is never served stale statistics.
+    # With max_pixels, scenes larger than the budget are histogrammed from
+    # a sample of block rows: exact on the sample, approximate for the scene.
+    def __init__(self, max_entries: int = RASTER_STATS_CACHE_SIZE, bins: int = PERCENTILE_HISTOGRAM_BINS):
+        self.max_entries = max_entries
+        self.bins = bins
+        self._entries: "OrderedDict[tuple, BandHistogram]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(path: str, bands: Sequence[int], max_pixels: Optional[int] = None) -> tuple:
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns, tuple(bands), max_pixels
+
+    def histogram(self, path: str, bands: Sequence[int], src=None, max_pixels: Optional[int] = None) -> BandHistogram:
+        key = self.make_key(path, bands, max_pixels)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        if src is None:
+            import rasterio
+            with rasterio.open(path) as opened:
+                entry = compute_histogram(opened, bands, self.bins, max_pixels)
+        else:
+            entry = compute_histogram(src, bands, self.bins, max_pixels)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def percentiles(self, path: str, bands: Sequence[int], q, src=None, max_pixels: Optional[int] = None) -> np.ndarray:
+        return self.histogram(path, bands, src, max_pixels).percentile(q)
+
+    def band_range(self, path: str, band: int, src=None) -> Tuple[float, float]:
+        entry = self.histogram(path, (band,), src)
+        return entry.min, entry.max
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+raster_stats = RasterStatsCache()
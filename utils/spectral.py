@@ -0,0 +1,79 @@
+import numpy as np
+from typing import Dict, Iterable, Optional
+
+from config.settings import SPECTRAL_CHUNK_PIXELS
+
+# Normalized-difference indices as (a, b) -> (a - b) / (a + b), by
+# SENTINEL2_BANDS name.
+SPECTRAL_INDICES = {
+    'ndwi': ('B3', 'B8'),
+    'mndwi': ('B3', 'B11'),
+    'ndvi': ('B8', 'B4'),
+}
+
+def required_bands(indices: Iterable[str]) -> list:
+    names = []
+    for index in indices:
+        if index not in SPECTRAL_INDICES:
+            raise ValueError(f"Indeks spektral tidak dikenali: {index}. Pilihan: {', '.join(SPECTRAL_INDICES)}")
+        for band_name in SPECTRAL_INDICES[index]:
+            if band_name not in names:
+                names.append(band_name)
+    return names
+
+def _chunk_rows(shape, chunk_pixels: int) -> int:
+    width = shape[-1] if len(shape) > 1 else shape[0]
+    return max(1, chunk_pixels // max(width, 1))
+
+def _normalized_difference_chunk(a, b, out, scratch, normalize: bool, threshold: Optional[float]) -> None:
+    np.add(a, b, out=scratch)
+    np.subtract(a, b, out=out)
+    # A zero denominator becomes 1e-8, as in the original NDWI formula.
+    np.copyto(scratch, np.float32(1e-8), where=scratch == 0)
+    np.divide(out, scratch, out=out)
+    np.nan_to_num(out, copy=False, nan=0.0, posinf=1.0, neginf=-1.0)
+    if normalize:
+        out += 1
+        out *= 0.5
+    if threshold is not None:
+        np.copyto(out, 0, where=out < threshold)
+
+def normalized_difference(a: np.ndarray, b: np.ndarray, normalize: bool = False, threshold: Optional[float] = None,
+                          out: Optional[np.ndarray] = None, chunk_pixels: int = SPECTRAL_CHUNK_PIXELS) -> np.ndarray:
+    # One pass over row chunks: the only full-size array is `out`, the
+    # denominator lives in a chunk-sized scratch buffer.
+    if a.shape != b.shape:
+        raise ValueError(f"Ukuran band tidak sama: {a.shape} vs {b.shape}")
+    if out is None:
+        out = np.empty(a.shape, dtype=np.float32)
+    rows = _chunk_rows(a.shape, chunk_pixels)
+    scratch = np.empty((rows, *a.shape[1:]), dtype=np.float32)
+    for start in range(0, a.shape[0], rows):
+        stop = min(start + rows, a.shape[0])
+        _normalized_difference_chunk(a[start:stop], b[start:stop], out[start:stop], scratch[:stop - start],
+                                     normalize, threshold)
+    return out
+
+def compute_indices(bands: Dict[str, np.ndarray], indices: Iterable[str], normalize: bool = True,
+                    thresholds: Optional[Dict[str, float]] = None, out: Optional[np.ndarray] = None,
+                    chunk_pixels: int = SPECTRAL_CHUNK_PIXELS) -> Dict[str, np.ndarray]:
+    # Several indices from one set of band buffers, chunk by chunk, so the
+    # bands of a chunk are still in cache when the next index reads them.
+    # `out` is an optional (len(indices), H, W) buffer filled in order.
+    indices = list(indices)
+    required_bands(indices)
+    thresholds = thresholds or {}
+    shape = next(iter(bands.values())).shape
+    if out is None:
+        out = np.empty((len(indices), *shape), dtype=np.float32)
+    outputs = dict(zip(indices, out))
+    rows = _chunk_rows(shape, chunk_pixels)
+    scratch = np.empty((rows, *shape[1:]), dtype=np.float32)
+    for start in range(0, shape[0], rows):
+        stop = min(start + rows, shape[0])
+        for index in indices:
+            band_a, band_b = SPECTRAL_INDICES[index]
+            _normalized_difference_chunk(bands[band_a][start:stop], bands[band_b][start:stop],
+                                         outputs[index][start:stop], scratch[:stop - start],
+                                         normalize, thresholds.get(index))
+    return outputs
@@ -0,0 +1,181 @@
+import sys
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from config.settings import TRACE_ALLOCATIONS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+class _StageRecord:
+    def __init__(self):
+        self.calls = 0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.rss_growth_mb = 0.0
+        self.alloc_peak_mb = None
+        self.counts: Dict[str, int] = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = {
+            'calls': self.calls,
+            'wall_s': round(self.wall_s, 4),
+            'cpu_s': round(self.cpu_s, 4),
+            'rss_growth_mb': round(self.rss_growth_mb, 2),
+        }
+        if self.alloc_peak_mb is not None:
+            data['alloc_peak_mb'] = round(self.alloc_peak_mb, 2)
+        data.update(self.counts)
+        return data
+
+class StageTracer:
+    # Accumulates wall time, process CPU time and memory growth per named
+    # stage, plus item counters. CPU time is process-wide so inference
+    # threads are included; stages running concurrently on other threads
+    # are attributed to both. With allocations enabled, tracemalloc reports
+    # the Python/numpy allocation peak of each outermost stage.
+    def __init__(self, trace_allocations: bool = TRACE_ALLOCATIONS):
+        self.trace_allocations = trace_allocations
+        self.stages: Dict[str, _StageRecord] = {}
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._depth = 0
+        self._started_tracemalloc = False
+        self._started = None
+        self._elapsed = None
+
+    def start(self) -> "StageTracer":
+        self._started = time.perf_counter()
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        return self
+
+    def stop(self) -> None:
+        if self._started is not None:
+            self._elapsed = time.perf_counter() - self._started
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name: str):
+        with self._lock:
+            self._depth += 1
+            outermost = self._depth == 1
+        track_alloc = outermost and tracemalloc.is_tracing()
+        if track_alloc:
+            alloc_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        rss_start = peak_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            rss_end = peak_rss_mb()
+            alloc_peak = None
+            if track_alloc:
+                alloc_peak = (tracemalloc.get_traced_memory()[1] - alloc_start) / (1024 * 1024)
+            with self._lock:
+                self._depth -= 1
+                record = self.stages.setdefault(name, _StageRecord())
+                record.calls += 1
+                record.wall_s += wall
+                record.cpu_s += cpu
+                if rss_start is not None:
+                    record.rss_growth_mb += rss_end - rss_start
+                if alloc_peak is not None:
+                    record.alloc_peak_mb = max(record.alloc_peak_mb or 0.0, alloc_peak)
+
+    def count(self, name: str, n: int, stage: Optional[str] = None) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + int(n)
+            if stage is not None:
+                record = self.stages.setdefault(stage, _StageRecord())
+                record.counts[name] = record.counts.get(name, 0) + int(n)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'elapsed_s': None if self._elapsed is None else round(self._elapsed, 4),
+                'peak_rss_mb': None if peak_rss_mb() is None else round(peak_rss_mb(), 1),
+                'stages': {name: record.as_dict() for name, record in self.stages.items()},
+                'counts': dict(self.counts),
+            }
+
+    def format(self) -> str:
+        lines = [f"{'stage':<20}{'calls':>6}{'wall s':>10}{'cpu s':>10}{'rss+ MB':>10}"]
+        for name, record in self.stages.items():
+            lines.append(f"{name:<20}{record.calls:>6}{record.wall_s:>10.3f}{record.cpu_s:>10.3f}{record.rss_growth_mb:>10.1f}")
+        if self.counts:
+            lines.append(", ".join(f"{k}={v}" for k, v in self.counts.items()))
+        return "\n".join(lines)
+
+# The tracer of the detection running in this process; module-level so the
+# detectors can report stages without a tracer argument on every call.
+_active: Optional[StageTracer] = None
+
+@contextmanager
+def activate(tracer: StageTracer):
+    global _active
+    previous, _active = _active, tracer.start()
+    try:
+        yield tracer
+    finally:
+        tracer.stop()
+        _active = previous
+
+@contextmanager
+def trace_stage(name: str):
+    tracer = _active
+    if tracer is None:
+        yield
+        return
+    with tracer.stage(name):
+        yield
+
+def trace_count(name: str, n: int, stage: Optional[str] = None) -> None:
+    tracer = _active
+    if tracer is not None:
+        tracer.count(name, n, stage)
+
+def json_safe(value):
+    if isinstance(value, dict):
+        return {str(k): json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+def write_run_report(path, report: Dict[str, Any]) -> Optional[str]:
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(json_safe(report), f, indent=2, ensure_ascii=False)
+        return str(path)
+    except Exception as e:
+        logger.error(f"Error writing run report: {str(e)}")
+        return None